@@ -0,0 +1,520 @@
+"""Micro-benchmarks for the scraper's hot paths - no browser or network required
+
+Usage:
+    python benchmark.py dedup [--sizes 1000 5000 10000]
+    python benchmark.py rate-limiter [--capacity 0.3] [--duration 3600]
+    python benchmark.py memory [--users 100000] [--mutual-every 3]
+    python benchmark.py browser [--pages 30] [--base-url https://x.com --usernames a b c]
+    python benchmark.py e2e [--sizes 1000 10000 50000] [--mode lists] [--virtualize] [--latency 0.05] [--throttle-every 40]
+    python benchmark.py follow-graph [--edges 100000] [--runs 300] [--churn 0.01]
+
+The browser and e2e benchmarks need Firefox, and psutil for the memory columns.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import scraper
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+CELLS_PER_VIEW = 30   # UserCells mounted at once in the virtualized list
+NEW_CELLS_PER_SCROLL = 10
+
+
+class LinearScanUsers(scraper.CollectedUsers):
+    """Baseline reproducing the old any(...) duplicate check with no href memory"""
+
+    def append(self, user, href=None):
+        list.append(self, user)
+
+    def has_user(self, username):
+        return any(user.username == username for user in self)
+
+
+class ScrollingListDriver:
+    """Serves a sliding window of synthetic UserCells, as if every mounted row were re-rendered each scroll"""
+
+    def __init__(self, total_users):
+        self.total_users = total_users
+        self.top = 0
+
+    def execute_script(self, script, *args):
+        end = min(self.top + CELLS_PER_VIEW, self.total_users)
+        cells = [{
+            'hrefs': [f'https://x.com/bench_user_{i}'],
+            'time': None,
+            'avatar': f'https://pbs.twimg.com/profile_images/{i}/avatar_normal.jpg',
+            'has_status': True,
+            'follows_you': i % 3 == 0
+        } for i in range(self.top, end)]
+        self.top += NEW_CELLS_PER_SCROLL
+        return {'cells': cells, 'spans': []}
+
+    def exhausted(self):
+        return self.top >= self.total_users
+
+
+def run_collection(users_data, total_users):
+    """Scroll a synthetic list to the end, returns per-scroll timings in seconds"""
+    driver = ScrollingListDriver(total_users)
+    timings = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        while not driver.exhausted():
+            start = time.perf_counter()
+            scraper.collect_users_from_script(driver, users_data)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def bench_dedup(sizes):
+    print("Dedup scaling: per-scroll cost at the start and end of the list")
+    print(f"{'users':>8} {'collector':>10} {'total s':>9} {'first 10% us/scroll':>20} {'last 10% us/scroll':>19}")
+    for size in sizes:
+        for label, users_data in (('linear', LinearScanUsers()), ('indexed', scraper.CollectedUsers())):
+            timings = run_collection(users_data, size)
+            assert len(users_data) == size, f"{label} collected {len(users_data)}/{size} users"
+            tenth = max(1, len(timings) // 10)
+            first = sum(timings[:tenth]) / tenth * 1e6
+            last = sum(timings[-tenth:]) / tenth * 1e6
+            print(f"{size:>8} {label:>10} {sum(timings):>9.3f} {first:>20.1f} {last:>19.1f}")
+
+
+class SimulatedClock:
+    """Virtual time so the rate limiter can be exercised for hours in milliseconds"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class SimulatedServer:
+    """Token-bucket server that answers 429 once a client exceeds capacity requests/second"""
+
+    def __init__(self, capacity, burst=5):
+        self.capacity = capacity
+        self.burst = burst
+        self.tokens = burst
+        self.last = 0.0
+
+    def request(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.capacity)
+        self.last = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 200
+        return 429
+
+
+def simulate_rate_limiter(capacity, duration, windows=12):
+    """Drive an AdaptiveRateLimiter against a SimulatedServer in virtual time.
+    Returns per-window (end minute, limiter req/s, accepted req/s, 429s) rows and the limiter"""
+    clock = SimulatedClock()
+    server = SimulatedServer(capacity)
+    limiter = scraper.AdaptiveRateLimiter('simulated', 1 / scraper.PROFILE_CHECK_DELAY,
+                                          max_speedup=capacity * scraper.PROFILE_CHECK_DELAY * 3,
+                                          clock=clock.time, sleep=clock.sleep)
+    window = duration / windows
+    rows = []
+    window_end, accepted, throttled = window, 0, 0
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        while clock.now < duration:
+            limiter.acquire()
+            if server.request(clock.now) == 429:
+                throttled += 1
+                limiter.on_throttle('HTTP 429')
+            else:
+                accepted += 1
+                limiter.on_success()
+            if clock.now >= window_end:
+                rows.append((window_end / 60, limiter.rate, accepted / window, throttled))
+                window_end, accepted, throttled = window_end + window, 0, 0
+    return rows, limiter
+
+
+def bench_rate_limiter(capacity, duration):
+    print(f"Rate limiter vs simulated server allowing {capacity:.2f} req/s "
+          f"(starting at {1 / scraper.PROFILE_CHECK_DELAY:.2f} req/s)")
+    print(f"{'minute':>7} {'limiter req/s':>14} {'accepted req/s':>15} {'429s':>6}")
+    rows, limiter = simulate_rate_limiter(capacity, duration)
+    for minute, rate, accepted_rate, throttles in rows:
+        print(f"{minute:>7.0f} {rate:>14.3f} {accepted_rate:>15.3f} {throttles:>6}")
+    second_half = rows[len(rows) // 2:]
+    utilisation = sum(row[2] for row in second_half) / len(second_half) / capacity
+    print(f"Second-half throughput: {utilisation:.0%} of server capacity, {limiter.throttles} rate-limit events in total")
+
+
+def synthetic_avatar_url(i):
+    """A fresh avatar URL string per user, with every 10th on the shared default avatar like real lists"""
+    if i % 10 == 0:
+        return ''.join(['https://abs.twimg.com/sticky/', 'default_profile_images/default_profile_normal.png'])
+    return f'https://pbs.twimg.com/profile_images/{1000000 + i}/avatar_{i}.jpg'
+
+
+def build_dict_pipeline(count, mutual_every):
+    """The old layout: a dict per collected user, copied into a mutual dict and again into a results dict"""
+    following = [{
+        'username': f'bench_user_{i}',
+        'follow_date': f'position_{i}',
+        'position': i,
+        'has_status_indicator': True,
+        'follows_you': i % mutual_every == 0,
+        'profile_pic_url': synthetic_avatar_url(i)
+    } for i in range(count)]
+    mutual = [{
+        'username': user['username'],
+        'follow_date': user['follow_date'],
+        'position': user['position'],
+        'source': 'mutual_following',
+        'profile_pic_url': user['profile_pic_url'],
+        'pic_downloaded': True,
+        'temp_filename': f"temp_{user['position']:03d}_@{user['username']}.jpg"
+    } for user in following if user['follows_you']]
+    results = [{
+        'number': number,
+        'username': user['username'],
+        'handle': f"@{user['username']}",
+        'follow_date': user['follow_date'],
+        'original_position': user['position'],
+        'profile_pic_url': user['profile_pic_url'],
+        'pic_downloaded': True,
+        'filename': f"{number:03d}_@{user['username']}.jpg"
+    } for number, user in enumerate(mutual, 1)]
+    return following, mutual, results
+
+
+def build_record_pipeline(count, mutual_every):
+    """The record layout: one slotted UserRecord per user, mutuals are the same objects with their file fields set"""
+    following = [scraper.UserRecord(f'bench_user_{i}', i, None, True, i % mutual_every == 0, synthetic_avatar_url(i))
+                 for i in range(count)]
+    mutual = [user for user in following if user.follows_you]
+    for number, user in enumerate(mutual, 1):
+        user.pic_downloaded = True
+        user.number = number
+        user.filename = f'{number:03d}_@{user.username}.jpg'
+    return following, mutual
+
+
+def measure_allocation(build, *args):
+    """Build a structure under tracemalloc, returns (bytes still allocated, seconds)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    kept = build(*args)
+    elapsed = time.perf_counter() - start
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return allocated, elapsed
+
+
+def bench_memory(count, mutual_every):
+    print(f"Per-user memory: {count} synthetic users, 1 in {mutual_every} a mutual")
+    print(f"{'layout':>10} {'MB':>8} {'bytes/user':>11} {'build s':>8}")
+    for label, build in (('dicts', build_dict_pipeline), ('records', build_record_pipeline)):
+        allocated, elapsed = measure_allocation(build, count, mutual_every)
+        print(f"{label:>10} {allocated / 1024 / 1024:>8.1f} {allocated / count:>11.0f} {elapsed:>8.2f}")
+
+
+def bench_follow_graph(edges, runs, churn):
+    print(f"Follow graph: {runs} runs of a {edges}-edge list, {churn:.1%} of edges replaced per run")
+    print(f"{'runs':>6} {'record ms':>10} {'diff ms':>8} {'seen ms':>8} {'edge rows':>10} {'db MB':>7}")
+    rng = random.Random(1)
+    current = [f'user{i}' for i in range(edges)]
+    next_id = edges
+    report_every = max(1, runs // 10)
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, 'follow_graph.db')
+        graph = scraper.FollowGraph(db_path)
+        for run in range(1, runs + 1):
+            for _ in range(int(edges * churn)):
+                current[rng.randrange(edges)] = f'user{next_id}'
+                next_id += 1
+            started = time.perf_counter()
+            graph.record_run('target', 'mutual', current)
+            record_ms = (time.perf_counter() - started) * 1e3
+            if run % report_every and run != runs:
+                continue
+            started = time.perf_counter()
+            gained, lost = graph.diff('target', 'mutual')
+            diff_ms = (time.perf_counter() - started) * 1e3
+            started = time.perf_counter()
+            graph.seen('target', 'mutual', current[rng.randrange(edges)])
+            seen_ms = (time.perf_counter() - started) * 1e3
+            rows = graph.connection.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+            size_mb = os.path.getsize(db_path) / 1024 / 1024
+            print(f"{run:>6} {record_ms:>10.1f} {diff_ms:>8.1f} {seen_ms:>8.2f} {rows:>10} {size_mb:>7.1f}")
+        graph.close()
+
+
+# Time from navigation start to the end of the load event, as the browser measured it
+PAGE_LOAD_JS = """
+const entry = performance.getEntriesByType('navigation')[0];
+return entry ? entry.loadEventEnd - entry.startTime : null;
+"""
+
+
+def browser_rss_mb(driver):
+    """Resident memory of Firefox and its content processes in MB, None if it can't be measured"""
+    pid = driver.capabilities.get('moz:processID')
+    if psutil is None or not pid:
+        return None
+    try:
+        browser = psutil.Process(pid)
+        processes = [browser] + browser.children(recursive=True)
+    except psutil.Error:
+        return None
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            continue  # Content processes come and go
+    return total / 1024 / 1024
+
+
+def bench_browser(pages, base_url=None, usernames=None):
+    fixture = None
+    if base_url is None:
+        from fixture_server import FixtureSite, start_fixture_server
+        fixture = start_fixture_server(FixtureSite('me', pages), port=0)
+        base_url = f'http://127.0.0.1:{fixture.server_address[1]}'
+        usernames = [f'user{i:05d}' for i in range(pages)]
+    scraper.X_BASE_URL = base_url
+    if psutil is None:
+        print("[!] psutil is not installed - browser memory won't be reported (pip install psutil)")
+
+    rows = []
+    for lean in (False, True):
+        driver = scraper.setup_driver(lean=lean)
+        try:
+            if fixture:
+                driver.get(f'{base_url}/login')
+            elif not scraper.restore_session(driver):
+                print(f"[-] No valid {scraper.SESSION_FILE} for {base_url} - log in with scraper.py first")
+                return
+            wall_times, load_times = [], []
+            for username in usernames:
+                start = time.perf_counter()
+                driver.get(f'{base_url}/{username}')
+                wall_times.append(time.perf_counter() - start)
+                load_ms = driver.execute_script(PAGE_LOAD_JS)
+                if load_ms:
+                    load_times.append(load_ms / 1000)
+            rows.append(('lean' if lean else 'default', wall_times, load_times, browser_rss_mb(driver)))
+        finally:
+            driver.quit()
+    if fixture:
+        fixture.shutdown()
+
+    print(f"Profile page loads: {len(usernames)} pages from {base_url}")
+    print(f"{'profile':>8} {'mean get s':>11} {'p95 get s':>10} {'mean load s':>12} {'browser RSS MB':>15}")
+    for label, wall_times, load_times, rss in rows:
+        wall_times = sorted(wall_times)
+        p95 = wall_times[min(len(wall_times) - 1, int(len(wall_times) * 0.95))]
+        mean_load = sum(load_times) / len(load_times) if load_times else float('nan')
+        rss_text = f'{rss:.0f}' if rss is not None else 'n/a'
+        print(f"{label:>8} {sum(wall_times) / len(wall_times):>11.3f} {p95:>10.3f} {mean_load:>12.3f} {rss_text:>15}")
+
+
+class PeakRssSampler:
+    """Polls the resident memory of this process and of every browser the scraper starts, keeping the peaks"""
+
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self.drivers = []
+        self.python_peak_mb = None
+        self.browser_peak_mb = None
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        if psutil is not None:
+            self.thread.start()
+
+    def _run(self):
+        process = psutil.Process()
+        while True:
+            python_mb = process.memory_info().rss / 1024 / 1024
+            self.python_peak_mb = max(self.python_peak_mb or 0, python_mb)
+            browser_mb = [rss for rss in (browser_rss_mb(driver) for driver in list(self.drivers)) if rss is not None]
+            if browser_mb:
+                self.browser_peak_mb = max(self.browser_peak_mb or 0, sum(browser_mb))
+            if self.stopped.wait(self.interval):
+                break
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread.is_alive():
+            self.thread.join()
+
+
+def write_fixture_session(base_url):
+    """Save a login session for the fixture site so the scraper restores it instead of asking for a manual login"""
+    from fixture_server import SESSION_COOKIE, SESSION_TOKEN
+    session = {
+        'base_url': base_url,
+        'saved_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'cookies': [{'name': SESSION_COOKIE, 'value': SESSION_TOKEN, 'path': '/'}],
+        'local_storage': {}
+    }
+    with open(scraper.SESSION_FILE, 'w', encoding='utf-8') as f:
+        json.dump(session, f)
+
+
+def run_scraper_against_fixture(site, mode, lean, interval, cooldown, workdir):
+    """Run scraper.main() end to end against site from workdir, returns its measurements"""
+    from fixture_server import start_fixture_server
+    fixture = start_fixture_server(site, port=0)
+    base_url = f'http://127.0.0.1:{fixture.server_address[1]}'
+    scraper.X_BASE_URL = base_url
+    scraper.MUTUAL_DETECTION_MODE = mode
+    scraper.metrics = scraper.RunMetrics()  # Each run writes its own scraper_metrics.json into its directory
+    # Fast, but still adaptive, so injected 429s are backed off from the way a real run would
+    scraper.navigation_limiter = scraper.AdaptiveRateLimiter('navigation', 1 / interval, cooldown=cooldown)
+    scraper.scroll_limiter = scraper.AdaptiveRateLimiter('scroll', 1 / interval, cooldown=cooldown)
+    scraper.image_limiter = scraper.AdaptiveRateLimiter('image', 5 / interval, burst=5, cooldown=cooldown)
+
+    sampler = PeakRssSampler()
+    setup_driver = scraper.setup_driver
+
+    def tracking_setup_driver(*args, **kwargs):
+        driver = setup_driver(*args, **kwargs)
+        sampler.drivers.append(driver)
+        return driver
+
+    original_cwd, original_argv = os.getcwd(), sys.argv
+    scraper.setup_driver = tracking_setup_driver
+    sys.argv = ['scraper.py', '--username', site.target] + (['--lean'] if lean else [])
+    os.chdir(workdir)
+    try:
+        write_fixture_session(base_url)
+        sampler.start()
+        start = time.perf_counter()
+        with open(f'scraper_{len(site.following)}.log', 'w', encoding='utf-8') as log, contextlib.redirect_stdout(log):
+            scraper.main()
+        elapsed = time.perf_counter() - start
+        try:
+            with open(scraper.JSON_OUTPUT_FILE, 'r', encoding='utf-8') as f:
+                results = json.load(f)
+        except (OSError, ValueError):
+            results = None
+    finally:
+        sampler.stop()
+        os.chdir(original_cwd)
+        sys.argv = original_argv
+        scraper.setup_driver = setup_driver
+        fixture.shutdown()
+
+    found = {user['username'] for user in results['results']} if results else set()
+    return {
+        'elapsed': elapsed,
+        'collected': results['total_following'] if results else 0,
+        'commands': sum(scraper.get_command_count(driver) for driver in sampler.drivers),
+        'mutuals_found': len(found & set(site.mutuals())),
+        'throttled': site.throttled_requests,
+        'python_peak_mb': sampler.python_peak_mb,
+        'browser_peak_mb': sampler.browser_peak_mb
+    }
+
+
+def bench_e2e(sizes, mode, lean, latency, throttle_every, virtualize, page_size, interval, cooldown):
+    from fixture_server import FixtureSite
+    if psutil is None:
+        print("[!] psutil is not installed - peak memory won't be reported (pip install psutil)")
+    scraper.GECKODRIVER_PATH_CACHE = os.path.abspath(scraper.GECKODRIVER_PATH_CACHE)
+    workdir = tempfile.mkdtemp(prefix='xmfs-e2e-')
+    print(f"[!] Running scraper.py against the fixture site from {workdir} (scraper logs are kept there)")
+
+    rows = []
+    for size in sizes:
+        site = FixtureSite('me', size, page_size=page_size, latency=latency, throttle_every=throttle_every,
+                           virtualize=virtualize)
+        run_dir = os.path.join(workdir, str(size))
+        os.makedirs(run_dir)
+        rows.append((size, len(site.mutuals()), run_scraper_against_fixture(site, mode, lean, interval, cooldown, run_dir)))
+
+    print(f"End to end: '{mode}' mode, {'virtualized' if virtualize else 'plain'} list, {latency:.2f}s latency, "
+          f"{'every ' + str(throttle_every) + 'th request' if throttle_every else 'no requests'} throttled")
+    print(f"{'following':>10} {'wall s':>8} {'users/s':>8} {'cmds/user':>10} {'mutuals found':>14} {'429s':>5} "
+          f"{'python MB':>10} {'browser MB':>11}")
+    for size, expected, run in rows:
+        python_mb = f"{run['python_peak_mb']:.0f}" if run['python_peak_mb'] is not None else 'n/a'
+        browser_mb = f"{run['browser_peak_mb']:.0f}" if run['browser_peak_mb'] is not None else 'n/a'
+        print(f"{size:>10} {run['elapsed']:>8.1f} {run['collected'] / run['elapsed']:>8.1f} "
+              f"{run['commands'] / size:>10.2f} {str(run['mutuals_found']) + '/' + str(expected):>14} "
+              f"{run['throttled']:>5} {python_mb:>10} {browser_mb:>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    dedup = subparsers.add_parser('dedup', help='Collected-user dedup index vs linear scan')
+    dedup.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 10000])
+
+    rate_limiter = subparsers.add_parser('rate-limiter', help='AIMD limiter convergence against a simulated server')
+    rate_limiter.add_argument('--capacity', type=float, default=0.3, help='Requests/second the server tolerates')
+    rate_limiter.add_argument('--duration', type=float, default=3600, help='Simulated seconds')
+
+    memory = subparsers.add_parser('memory', help='Per-user memory of dict rows vs slotted UserRecords')
+    memory.add_argument('--users', type=int, default=100000)
+    memory.add_argument('--mutual-every', type=int, default=3, help='Every Nth synthetic user is a mutual')
+
+    browser = subparsers.add_parser('browser', help='Page-load time and memory, default vs lean browser profile')
+    browser.add_argument('--pages', type=int, default=30, help='Profile pages to load from the local fixture site')
+    browser.add_argument('--base-url', help='Measure a real site instead (uses the saved SESSION_FILE login)')
+    browser.add_argument('--usernames', nargs='+', help='Profiles to load with --base-url')
+
+    e2e = subparsers.add_parser('e2e', help='Run the whole scraper against the local fixture site')
+    e2e.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000], help='Following-list lengths to serve')
+    e2e.add_argument('--mode', choices=['lists', 'profiles'], default='lists', help='MUTUAL_DETECTION_MODE to run with')
+    e2e.add_argument('--lean', action='store_true', help='Use the lean headless browser')
+    e2e.add_argument('--latency', type=float, default=0.0, help='Seconds the fixture adds to every response')
+    e2e.add_argument('--throttle-every', type=int, default=0, help='Answer every Nth list page / profile request with 429')
+    e2e.add_argument('--virtualize', action='store_true', help='Only mount list rows near the viewport, like x.com')
+    e2e.add_argument('--page-size', type=int, default=20, help='Users per list page')
+    e2e.add_argument('--interval', type=float, default=0.05, help='Starting seconds between navigations and scrolls')
+    e2e.add_argument('--cooldown', type=float, default=2, help='Seconds the limiters pause after a rate-limit signal')
+
+    follow_graph = subparsers.add_parser('follow-graph', help='Recording and diffing runs in the SQLite follow graph')
+    follow_graph.add_argument('--edges', type=int, default=100000, help='Edges in each run')
+    follow_graph.add_argument('--runs', type=int, default=300)
+    follow_graph.add_argument('--churn', type=float, default=0.01, help='Fraction of edges replaced between runs')
+
+    args = parser.parse_args()
+    if args.benchmark == 'dedup':
+        bench_dedup(args.sizes)
+    elif args.benchmark == 'rate-limiter':
+        bench_rate_limiter(args.capacity, args.duration)
+    elif args.benchmark == 'memory':
+        bench_memory(args.users, args.mutual_every)
+    elif args.benchmark == 'browser':
+        if args.base_url and not args.usernames:
+            parser.error('--base-url needs --usernames')
+        bench_browser(args.pages, args.base_url, args.usernames)
+    elif args.benchmark == 'e2e':
+        bench_e2e(args.sizes, args.mode, args.lean, args.latency, args.throttle_every, args.virtualize,
+                  args.page_size, args.interval, args.cooldown)
+    elif args.benchmark == 'follow-graph':
+        bench_follow_graph(args.edges, args.runs, args.churn)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,507 @@
+"""Local stand-in for x.com, used to exercise the scraper without touching the live site
+
+Serves a small single-page app that mimics the parts of x.com the scraper relies on:
+the login redirect, the logged-in home shell, profile pages with the "Follows you" badge,
+and infinitely scrolling following/followers lists that load paginated GraphQL-shaped JSON
+as you scroll. Like x.com, the lists can be virtualized so only the rows near the viewport are
+mounted, and responses can be slowed down or answered with HTTP 429. Everything but /login and avatars needs the session cookie /login sets, so
+a browser that wasn't given the login's cookies ends up on the login wall. List data is either generated
+(deterministic synthetic accounts) or replayed from responses recorded by the scraper with
+GRAPHQL_RECORD_DIR.
+
+Usage:
+    python fixture_server.py --target me --following 1000
+    python fixture_server.py --target me --fixtures recorded_graphql/
+    python fixture_server.py --target me --following 10000 --virtualize --latency 0.2 --throttle-every 50
+
+Then set X_BASE_URL = 'http://127.0.0.1:8765' and USERNAME = 'me' in scraper.py.
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_PORT = 8765
+PAGE_SIZE = 20
+
+# Smallest valid GIF (1x1 transparent) - served for every avatar
+AVATAR_BYTES = bytes.fromhex(
+    '47494638396101000100800000000000ffffff21f90401000000002c00000000010001000002024401003b'
+)
+AVATAR_ETAG = '"fixture-avatar-1"'
+AVATAR_LAST_MODIFIED = 'Mon, 01 Jan 2024 00:00:00 GMT'
+SESSION_COOKIE = 'auth_token'
+SESSION_TOKEN = 'fixture-session'
+
+LIST_ROUTE = re.compile(r'^/([^/]+)/(following|followers)/?$')
+GRAPHQL_ROUTE = re.compile(r'^/i/api/graphql/[^/]+/(Following|Followers)$')
+AVATAR_ROUTE = re.compile(r'^/pbs\.twimg\.com/profile_images/[^/]+/[^/]+$')
+PROFILE_ROUTE = re.compile(r'^/([A-Za-z0-9_]{1,15})/?$')
+
+RATE_LIMITED_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>X fixture</title></head>
+<body><main role="main"><div data-testid="primaryColumn"><span>Rate limit exceeded</span></div></main></body>
+</html>
+"""
+RATE_LIMITED_JSON = b'{"errors": [{"message": "Rate limit exceeded", "code": 88}]}'
+
+LOGIN_WALL_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>Log in to X</title></head>
+<body><h1>Log in to X</h1><a href="/login">Sign in</a></body>
+</html>
+"""
+
+PROFILE_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>__NAME__ (@__HANDLE__) / X fixture</title></head>
+<body>
+<main role="main">
+  <div data-testid="primaryColumn">
+    <div data-testid="UserAvatar-Container-__HANDLE__"><img alt="" src="__AVATAR__"></div>
+    <div data-testid="UserName">
+      <div><span>__NAME__</span></div>
+      <div><span>@__HANDLE__</span>__INDICATOR__</div>
+    </div>
+  </div>
+</main>
+</body>
+</html>
+"""
+
+APP_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>X fixture</title>
+<style>
+body { margin: 0; font-family: sans-serif; }
+[data-testid="UserCell"] { height: 72px; box-sizing: border-box; display: flex; align-items: center; gap: 8px;
+                           padding: 0 12px; border-bottom: 1px solid #eee; }
+#timeline.virtual { position: relative; }
+#timeline.virtual [data-testid="cellInnerDiv"] { position: absolute; top: 0; left: 0; right: 0; }
+[data-testid="UserCell"] img { width: 40px; height: 40px; border-radius: 50%; }
+</style>
+</head>
+<body>
+<main role="main">
+  <div data-testid="primaryColumn">
+    <nav><a data-testid="AppTabBar_Profile_Link" aria-label="Profile" href="/__TARGET__">Profile</a></nav>
+    <section id="timeline" aria-label="Home timeline"></section>
+    <div id="loader"></div>
+  </div>
+</main>
+<script>
+const PAGE_SIZE = __PAGE_SIZE__;
+const VIRTUALIZE = __VIRTUALIZE__;
+const OVERSCAN_ROWS = __OVERSCAN_ROWS__;
+const ROW_HEIGHT = 72;
+const RETRY_MS = 2000;
+const timeline = document.getElementById('timeline');
+const loader = document.getElementById('loader');
+let state = {op: null};
+let rows = [];            // Every user loaded so far, in list order
+let mounted = new Map();  // Row index -> mounted cell, when virtualized
+
+function escapeHtml(text) {
+  return String(text).replace(/[&<>"']/g, c => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c]));
+}
+
+function buildCell(user) {
+  const name = escapeHtml(user.legacy.screen_name);
+  const avatar = escapeHtml(user.legacy.profile_image_url_https);
+  const indicator = user.legacy.followed_by ? '<span data-testid="userFollowIndicator">Follows you</span>' : '';
+  const cell = document.createElement('div');
+  cell.setAttribute('data-testid', 'cellInnerDiv');
+  cell.innerHTML =
+    '<div data-testid="UserCell" role="button">' +
+      '<div data-testid="UserAvatar-Container-' + name + '"><img alt="" src="' + avatar + '"></div>' +
+      '<div><a href="/' + name + '" role="link"><span>' + name + '</span></a> ' +
+      '<a href="/' + name + '" role="link" tabindex="-1"><span>@' + name + '</span></a> ' + indicator + '</div>' +
+      '<button type="button"><span>Following</span></button>' +
+    '</div>';
+  return cell;
+}
+
+function addRow(user) {
+  rows.push(user);
+  if (!VIRTUALIZE) timeline.appendChild(buildCell(user));
+}
+
+// Mount only the rows in or near the viewport, in list order, and unmount the rest like x.com does
+function renderWindow() {
+  if (!VIRTUALIZE) return;
+  timeline.style.height = (rows.length * ROW_HEIGHT) + 'px';
+  const top = timeline.getBoundingClientRect().top;
+  const first = Math.max(0, Math.floor(-top / ROW_HEIGHT) - OVERSCAN_ROWS);
+  const last = Math.min(rows.length - 1, Math.ceil((window.innerHeight - top) / ROW_HEIGHT) + OVERSCAN_ROWS);
+  for (const [index, cell] of mounted) {
+    if (index < first || index > last) {
+      cell.remove();
+      mounted.delete(index);
+    }
+  }
+  let previous = null;
+  for (let index = first; index <= last; index++) {
+    let cell = mounted.get(index);
+    if (!cell) {
+      cell = buildCell(rows[index]);
+      cell.style.transform = 'translateY(' + (index * ROW_HEIGHT) + 'px)';
+      mounted.set(index, cell);
+      if (previous) previous.after(cell); else timeline.prepend(cell);
+    }
+    previous = cell;
+  }
+}
+
+function showError(current) {
+  // x.com's failed-timeline screen; retried automatically here so unattended runs can recover
+  loader.innerHTML = '<div>Something went wrong. Try reloading.</div><div role="button">Retry</div>';
+  loader.querySelector('[role="button"]').addEventListener('click', loadMore);
+  setTimeout(() => { if (current === state && !current.loading) loadMore(); }, RETRY_MS);
+}
+
+async function loadMore() {
+  if (!state.op || state.loading || state.done) return;
+  const current = state;
+  current.loading = true;
+  loader.innerHTML = '<div role="progressbar" aria-label="Loading"></div>';
+  const variables = encodeURIComponent(JSON.stringify({screen_name: current.user, count: PAGE_SIZE, cursor: current.cursor}));
+  let payload = null;
+  try {
+    const response = await fetch('/i/api/graphql/fixture/' + current.op + '?variables=' + variables);
+    payload = response.ok ? await response.json() : null;
+  } catch (e) {
+    payload = null;
+  }
+  if (current !== state) return;  // Navigated away while loading
+  if (!payload) {
+    current.loading = false;
+    showError(current);
+    return;
+  }
+  let users = 0;
+  let cursor = null;
+  const instructions = payload.data.user.result.timeline.timeline.instructions;
+  for (const instruction of instructions) {
+    for (const entry of instruction.entries || []) {
+      if (entry.content.cursorType === 'Bottom') {
+        cursor = entry.content.value;
+      } else if (entry.content.itemContent) {
+        addRow(entry.content.itemContent.user_results.result);
+        users += 1;
+      }
+    }
+  }
+  current.cursor = cursor;
+  current.done = !cursor || users === 0;
+  current.loading = false;
+  loader.innerHTML = '';
+  renderWindow();
+  // Keep loading until the viewport is filled, like the real list does
+  if (!current.done && document.body.scrollHeight <= window.innerHeight + 10) loadMore();
+}
+
+function route() {
+  timeline.innerHTML = '';
+  timeline.style.height = '';
+  timeline.className = VIRTUALIZE ? 'virtual' : '';
+  loader.innerHTML = '';
+  rows = [];
+  mounted = new Map();
+  const match = location.pathname.match(/^\\/([^\\/]+)\\/(following|followers)\\/?$/);
+  if (!match) {
+    state = {op: null};
+    timeline.textContent = 'Home timeline';
+    return;
+  }
+  state = {op: match[2] === 'following' ? 'Following' : 'Followers', user: match[1],
+           cursor: null, loading: false, done: false};
+  loadMore();
+}
+
+window.addEventListener('scroll', () => {
+  renderWindow();
+  if (window.innerHeight + window.scrollY >= document.body.scrollHeight - 400) loadMore();
+});
+window.addEventListener('popstate', route);
+route();
+</script>
+</body>
+</html>
+"""
+
+
+class FixtureSite:
+    """Synthetic (or recorded) account data served by the fixture server"""
+
+    def __init__(self, target='me', following_count=200, follow_back_every=3, page_size=PAGE_SIZE, fixtures_dir=None,
+                 latency=0.0, throttle_every=0, virtualize=False, overscan_rows=5):
+        self.target = target
+        self.page_size = page_size
+        self.recorded_pages = load_recorded_pages(fixtures_dir) if fixtures_dir else None
+        self.latency = latency  # Seconds added to every response
+        self.throttle_every = throttle_every  # Answer every Nth list page / profile request with 429 (0 = never)
+        self.virtualize = virtualize
+        self.overscan_rows = overscan_rows  # Rows kept mounted beyond each edge of the viewport when virtualized
+        self.throttled_requests = 0
+        self.counted_requests = 0
+        self.lock = threading.Lock()
+
+        # Newest follow first, like the real list; every Nth account follows back
+        self.following = [(f'user{i:05d}', i % follow_back_every == 0) for i in range(following_count)]
+        fans = [(f'fan{i:05d}', True) for i in range(following_count // 10)]
+        self.followers = [(name, True) for name, follows_back in self.following if follows_back] + fans
+        self.following_ids = {name: i for i, (name, _) in enumerate(self.following)}
+        self.follower_names = {name for name, _ in self.followers}
+
+    def should_throttle(self):
+        """Count a rate-limited request, returns True if it should get a 429"""
+        if not self.throttle_every:
+            return False
+        with self.lock:
+            self.counted_requests += 1
+            if self.counted_requests % self.throttle_every:
+                return False
+            self.throttled_requests += 1
+            return True
+
+    def app_page(self):
+        """Render the single-page app shell for the configured target and list behaviour"""
+        return (APP_HTML.replace('__TARGET__', self.target).replace('__PAGE_SIZE__', str(self.page_size))
+                .replace('__VIRTUALIZE__', 'true' if self.virtualize else 'false')
+                .replace('__OVERSCAN_ROWS__', str(self.overscan_rows)))
+
+    def mutuals(self):
+        """Usernames that appear on both lists, in following-list order"""
+        return [name for name, follows_back in self.following if follows_back]
+
+    def list_page(self, operation, cursor, host):
+        """Build one GraphQL-shaped page of the following or followers list"""
+        if self.recorded_pages is not None:
+            pages = self.recorded_pages.get(operation.lower(), [])
+            index = int(cursor or 0)
+            return pages[index] if index < len(pages) else build_list_payload([], None)
+
+        accounts = self.following if operation == 'Following' else self.followers
+        start = int(cursor or 0)
+        end = min(start + self.page_size, len(accounts))
+        users = [self.user_result(name, follows_back, host) for name, follows_back in accounts[start:end]]
+        return build_list_payload(users, str(end) if end < len(accounts) else None)
+
+    def follows_target(self, username):
+        """Whether username shows the "Follows you" badge to the target"""
+        return username in self.follower_names
+
+    def profile_page(self, username, host):
+        """Render a profile page, with the avatar at its larger 200x200 size like x.com"""
+        legacy = self.user_result(username, self.follows_target(username), host)['legacy']
+        indicator = ' <span dir="ltr">Follows you</span>' if legacy['followed_by'] else ''
+        return (PROFILE_HTML.replace('__NAME__', legacy['name']).replace('__HANDLE__', username)
+                .replace('__AVATAR__', legacy['profile_image_url_https'].replace('_normal', '_200x200'))
+                .replace('__INDICATOR__', indicator))
+
+    def user_result(self, username, followed_by, host):
+        """Build a GraphQL user result for one account"""
+        user_id = self.following_ids.get(username, zlib.crc32(username.encode('utf-8')))
+        return {
+            '__typename': 'User',
+            'rest_id': str(user_id),
+            'legacy': {
+                'screen_name': username,
+                'name': username.title(),
+                'profile_image_url_https': f'http://{host}/pbs.twimg.com/profile_images/{user_id}/{username}_normal.jpg',
+                'followed_by': followed_by,
+                'following': username in self.following_ids
+            }
+        }
+
+
+def build_list_payload(users, bottom_cursor):
+    """Wrap user results in the timeline structure the Following/Followers operations return"""
+    entries = [{
+        'entryId': f'user-{user["rest_id"]}',
+        'content': {
+            'entryType': 'TimelineTimelineItem',
+            'itemContent': {'itemType': 'TimelineUser', 'user_results': {'result': user}}
+        }
+    } for user in users]
+    if bottom_cursor is not None:
+        entries.append({
+            'entryId': f'cursor-bottom-{bottom_cursor}',
+            'content': {'entryType': 'TimelineTimelineCursor', 'cursorType': 'Bottom', 'value': bottom_cursor}
+        })
+    instructions = [{'type': 'TimelineAddEntries', 'entries': entries}]
+    return {'data': {'user': {'result': {'timeline': {'timeline': {'instructions': instructions}}}}}}
+
+
+def load_recorded_pages(fixtures_dir):
+    """Load <operation>_NNNN.json pages, rewriting bottom cursors to the next page index"""
+    pages = {}
+    for filename in sorted(os.listdir(fixtures_dir)):
+        match = re.match(r'^(following|followers)_\d+\.json$', filename)
+        if not match:
+            continue
+        with open(os.path.join(fixtures_dir, filename), encoding='utf-8') as f:
+            pages.setdefault(match.group(1), []).append(json.load(f))
+
+    for operation_pages in pages.values():
+        for index, payload in enumerate(operation_pages):
+            next_cursor = str(index + 1) if index + 1 < len(operation_pages) else None
+            rewrite_bottom_cursor(payload, next_cursor)
+    return pages
+
+
+def rewrite_bottom_cursor(node, value):
+    """Point every Bottom cursor entry in a payload at value (or drop it when value is None)"""
+    if isinstance(node, dict):
+        entries = node.get('entries')
+        if isinstance(entries, list):
+            kept = []
+            for entry in entries:
+                content = entry.get('content') or {}
+                if content.get('cursorType') == 'Bottom':
+                    if value is None:
+                        continue
+                    content['value'] = value
+                kept.append(entry)
+            node['entries'] = kept
+        for child in node.values():
+            rewrite_bottom_cursor(child, value)
+    elif isinstance(node, list):
+        for child in node:
+            rewrite_bottom_cursor(child, value)
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Routes requests to the fixture site attached to the server"""
+
+    def do_GET(self):
+        site = self.server.site
+        parsed = urlparse(self.path)
+        path = parsed.path
+        if site.latency:
+            time.sleep(site.latency)
+
+        if path == '/login':
+            # Stands in for a completed manual login
+            self.send_response(302)
+            self.send_header('Set-Cookie', f'{SESSION_COOKIE}={SESSION_TOKEN}; Path=/')
+            self.send_header('Location', '/home')
+            self.end_headers()
+            return
+
+        if AVATAR_ROUTE.match(path):
+            if self.headers.get('If-None-Match') == AVATAR_ETAG:
+                self.send_response(304)
+                self.send_header('ETag', AVATAR_ETAG)
+                self.end_headers()
+                return
+            self.send_body(200, 'image/gif', AVATAR_BYTES,
+                           {'ETag': AVATAR_ETAG, 'Last-Modified': AVATAR_LAST_MODIFIED})
+            return
+
+        if path == '/favicon.ico':
+            self.send_body(404, 'text/plain', b'Not found')
+            return
+
+        if not self.logged_in():
+            if path.startswith('/i/api/'):
+                self.send_body(403, 'application/json', b'{"errors": [{"message": "Not logged in"}]}')
+            elif path == '/i/flow/login':
+                self.send_body(200, 'text/html; charset=utf-8', LOGIN_WALL_HTML.encode('utf-8'))
+            else:
+                self.send_response(302)
+                self.send_header('Location', '/i/flow/login')
+                self.end_headers()
+            return
+
+        graphql = GRAPHQL_ROUTE.match(path)
+        if graphql:
+            if site.should_throttle():
+                self.send_body(429, 'application/json', RATE_LIMITED_JSON)
+                return
+            variables = json.loads(parse_qs(parsed.query).get('variables', ['{}'])[0])
+            payload = site.list_page(graphql.group(1), variables.get('cursor'), self.headers.get('Host'))
+            self.send_body(200, 'application/json', json.dumps(payload).encode('utf-8'))
+            return
+
+        if path in ('/', '/home') or LIST_ROUTE.match(path):
+            self.send_body(200, 'text/html; charset=utf-8', site.app_page().encode('utf-8'))
+            return
+
+        profile = PROFILE_ROUTE.match(path)
+        if profile:
+            if site.should_throttle():
+                self.send_body(429, 'text/html; charset=utf-8', RATE_LIMITED_HTML.encode('utf-8'))
+                return
+            html = site.profile_page(profile.group(1), self.headers.get('Host'))
+            self.send_body(200, 'text/html; charset=utf-8', html.encode('utf-8'))
+            return
+
+        self.send_body(404, 'text/plain', b'Not found')
+
+    def logged_in(self):
+        cookies = SimpleCookie(self.headers.get('Cookie', ''))
+        return SESSION_COOKIE in cookies and cookies[SESSION_COOKIE].value == SESSION_TOKEN
+
+    def send_body(self, status, content_type, body, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def start_fixture_server(site, host='127.0.0.1', port=DEFAULT_PORT, verbose=False):
+    """Serve site in a background thread, returns the running server (call shutdown() to stop)"""
+    server = ThreadingHTTPServer((host, port), FixtureHandler)
+    server.daemon_threads = True
+    server.site = site
+    server.verbose = verbose
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--target', default='me', help='Username whose lists are served')
+    parser.add_argument('--following', type=int, default=200, help='Number of synthetic accounts followed')
+    parser.add_argument('--follow-back-every', type=int, default=3, help='Every Nth followed account follows back')
+    parser.add_argument('--fixtures', help='Directory of recorded following_NNNN.json / followers_NNNN.json pages')
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE, help='Users per list page')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--throttle-every', type=int, default=0, help='Answer every Nth list page / profile request with HTTP 429')
+    parser.add_argument('--virtualize', action='store_true', help='Only mount list rows near the viewport, like x.com')
+    parser.add_argument('--overscan-rows', type=int, default=5, help='Rows mounted beyond each edge of the viewport when virtualized')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+
+    site = FixtureSite(args.target, args.following, args.follow_back_every, args.page_size, args.fixtures,
+                       args.latency, args.throttle_every, args.virtualize, args.overscan_rows)
+    server = start_fixture_server(site, args.host, args.port, args.verbose)
+    print(f"[+] Fixture site for @{args.target} at http://{args.host}:{args.port}")
+    print(f"[!] Set X_BASE_URL = 'http://{args.host}:{args.port}' in scraper.py. Press Ctrl-C to stop.")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,7 @@
 import os
+import argparse
 import requests
+from requests.adapters import HTTPAdapter
 import json
 from bs4 import BeautifulSoup
 from selenium import webdriver
@@ -8,28 +10,598 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.firefox.options import Options
 from selenium.webdriver.firefox.service import Service
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, InvalidSessionIdException, WebDriverException
 from webdriver_manager.firefox import GeckoDriverManager
 import time
 import re
+import sys
+import queue
+import threading
+import hashlib
+import shutil
+import sqlite3
+import glob
+from urllib.parse import urljoin
+
+try:
+    import lxml  # noqa: F401 - only probed so BeautifulSoup can use the faster parser
+    SNAPSHOT_PARSER = 'lxml'
+except ImportError:
+    SNAPSHOT_PARSER = 'html.parser'
 
 # --- CONFIG ---
-USERNAME = input("Enter your X/Twitter username (without @): ").strip()
+USERNAME = ''              # Your X/Twitter username (without @) - prompted for at startup if left empty
 DOWNLOAD_DIR = 'profile_pics'
-SCROLL_PAUSE_TIME = 3      # Time to wait between scrolls (increased for rate limiting)
-PROFILE_CHECK_DELAY = 10    # Delay between profile visits to avoid 429 errors
+SCROLL_PAUSE_TIME = 3      # Starting interval between scrolls - adapted at runtime by the scroll rate limiter
+PROFILE_CHECK_DELAY = 10    # Starting interval between profile visits - adapted at runtime by the navigation rate limiter
+SCROLL_WAIT_TIMEOUT = 10    # Max seconds to wait for new rows after a scroll while the list is still loading
+SCROLL_SETTLE_TIME = 1.0    # Seconds of no DOM changes with no loader spinner before a scroll is considered idle
+SCROLL_STEP_WAIT = 0.15     # Seconds to wait for rows to mount after a step that doesn't reach the end of the list
+SCROLL_STEP_OVERLAP = 0.2   # Fraction of the viewport each step keeps from the already-read rows above it
 JSON_OUTPUT_FILE = 'mutual_following.json'  # JSON output file
+OUTPUT_FORMAT = 'json'  # 'json' (one file written at the end) or 'jsonl' (records streamed as they resolve + a manifest)
+JSONL_OUTPUT_FILE = 'mutual_following.jsonl'  # Streamed records in 'jsonl' mode
+MANIFEST_FILE = 'mutual_following.manifest.json'  # Run summary written once a 'jsonl' run completes
+X_BASE_URL = 'https://x.com'  # Site to scrape - point at fixture_server.py for local testing
+MUTUAL_DETECTION_MODE = 'profiles'  # 'profiles' (visit each profile) or 'lists' (intersect following/followers lists)
+TRUST_FOLLOWS_YOU_INDICATOR = True  # Mark users mutual straight from a "Follows you" badge in the list cell
+CELL_EXTRACTION_MODE = 'script'  # 'script' (one in-browser call per scroll), 'snapshot' (cell HTML parsed off-thread) or 'elements' (per-cell WebDriver calls)
+SNAPSHOT_DIR = None  # Record list-cell ('snapshot' mode) and profile HTML here for `--offline` re-parsing
+LIST_INGESTION_MODE = 'dom'  # 'dom' (scrape rendered UserCells) or 'graphql' (capture the list's JSON responses)
+GRAPHQL_RECORD_DIR = None  # Save captured list responses here (servable with fixture_server.py --fixtures)
+AVATAR_DOWNLOAD_WORKERS = 4  # Concurrent avatar downloads sharing one keep-alive session (0 = download inline)
+AVATAR_CACHE_DIR = '.avatar_cache'  # Content-addressed avatar store reused across runs (None = disabled)
+RELATIONSHIP_DB_FILE = 'relationships.db'  # SQLite cache of follow-back checks across runs (None = disabled)
+RELATIONSHIP_TTL_HOURS = 72  # Re-check a cached follow-back status once it is older than this
+FOLLOW_GRAPH_DB_FILE = 'follow_graph.db'  # SQLite history of every complete run's following/followers/mutual sets, for --diff (None = disabled)
+PROFILE_CHECK_WORKERS = 1  # Browsers visiting profiles in parallel - extras reuse the login's cookies (3-4 keeps the rate budget busy)
+CHECKPOINT_FILE = 'scraper_checkpoint.json'  # Progress snapshot used by --resume
+LIST_CACHE_FILE = 'list_cache.json'  # Last complete following/followers lists, the base for incremental runs (None = disabled)
+INCREMENTAL_SCROLL = False  # Stop scrolling where a list joins its cached copy and reuse the rest (same as --incremental)
+INCREMENTAL_MATCH_RUN = 10  # Consecutive cached users, in their cached order, that mark where the list joins the cache
+CHECKPOINT_INTERVAL = 25  # Users processed between checkpoints
+BATCH_OUTPUT_DIR = 'batch_output'  # --batch writes each target's pictures, results and checkpoint under <this>/<username>/
+SESSION_FILE = 'x_session.json'  # Login cookies + localStorage restored on startup to skip manual login (None = disabled)
+GECKODRIVER_PATH_CACHE = '.geckodriver_path'  # Remembers the resolved geckodriver so startup doesn't hit the network
+LEAN_BROWSER = False  # Headless Firefox that skips images, media, fonts and trackers (needs a saved SESSION_FILE login)
+LEAN_BLOCKED_HOSTS = [  # Resolved to localhost in lean mode so their scripts fail fast
+    'www.google-analytics.com', 'analytics.twitter.com', 'static.ads-twitter.com', 'ads-api.twitter.com'
+]
+RATE_LIMIT_MAX_SPEEDUP = 5  # Rate limiters may go up to this many times faster than their starting interval
+RATE_LIMIT_MAX_SLOWDOWN = 6  # ...and back off to this many times slower when the site pushes back
+RATE_LIMIT_INCREASE = 0.05  # Additive increase per clean response, as a fraction of the starting rate
+RATE_LIMIT_DECREASE = 0.5   # Multiplicative decrease when a 429 / "Rate limit exceeded" / empty timeline is seen
+RATE_LIMIT_COOLDOWN = 60    # Seconds to pause all requests of that kind after a rate-limit signal
+METRICS_FILE = 'scraper_metrics.json'  # Per-phase timings, WebDriver/HTTP counters and rate-limit events of the last run (None = disabled)
+METRICS_PROM_FILE = 'scraper_metrics.prom'  # Same metrics in Prometheus text format, e.g. for node_exporter's textfile collector (None = disabled)
+
+IMAGE_REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:120.0) Gecko/20100101 Firefox/120.0',
+    'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1'
+}
+
+PROCESSED_CELL_ATTR = 'data-xmfs-seen'  # Marks UserCells already handled so later scrolls skip them
+CELL_OFFSET_ATTR = 'data-xmfs-top'  # Carries a snapshotted UserCell's page position into its serialized HTML
+
+# Image selectors tried (in order) when looking for an avatar inside a UserCell
+CELL_IMG_SELECTORS = [
+    'img[src*="profile_images"]',
+    'img[src*="pbs.twimg.com"]',
+    '[data-testid*="Avatar"] img',
+    '[data-testid="UserAvatar-Container"] img',
+    'img[alt*="profile"]',
+    'div img[src*="twimg"]',
+    'img'
+]
+
+# Page-coordinate spans of the mounted UserCells that carry the processed attribute, merged while consecutive
+# in page order. A mounted cell that isn't marked (still rendering, or its read failed) ends the span, so its
+# stretch stays a coverage gap and is revisited
+READ_SPANS_FUNCTION_JS = """
+const readSpans = (processedAttr) => {
+    const rows = Array.from(document.querySelectorAll('[data-testid="UserCell"]')).map(cell => {
+        const rect = cell.getBoundingClientRect();
+        return {top: rect.top + window.scrollY, bottom: rect.bottom + window.scrollY, read: cell.hasAttribute(processedAttr)};
+    }).sort((a, b) => a.top - b.top);
+    const spans = [];
+    let current = null;
+    for (const row of rows) {
+        if (!row.read) current = null;
+        else if (current) current[1] = Math.max(current[1], row.bottom);
+        else spans.push(current = [row.top, row.bottom]);
+    }
+    return spans;
+};
+"""
+
+# Extracts every not-yet-processed UserCell in one round trip and marks it as processed, returning the cells and
+# the spans read so far; arguments[0] is CELL_IMG_SELECTORS, arguments[1] is PROCESSED_CELL_ATTR
+EXTRACT_USER_CELLS_JS = READ_SPANS_FUNCTION_JS + """
+const imgSelectors = arguments[0];
+const processedAttr = arguments[1];
+const isProfileImage = src => !!src && /^https?:\\/\\//.test(src) &&
+    src.includes('pbs.twimg.com') && src.includes('profile_images');
+const ownTextIncludes = (cell, needles) => {
+    const walker = document.createTreeWalker(cell, NodeFilter.SHOW_TEXT);
+    while (walker.nextNode()) {
+        const text = walker.currentNode.nodeValue;
+        if (needles.some(needle => text.includes(needle))) return true;
+    }
+    return false;
+};
+const cells = document.querySelectorAll(`[data-testid="UserCell"]:not([${processedAttr}])`);
+const extracted = Array.from(cells).map(cell => {
+    let avatar = null;
+    for (const selector of imgSelectors) {
+        const img = Array.from(cell.querySelectorAll(selector)).find(i => isProfileImage(i.src));
+        if (img) { avatar = img.src; break; }
+    }
+    const time = cell.querySelector('time');
+    const hrefs = Array.from(cell.querySelectorAll('a[href^="/"]')).map(a => a.href);
+    // Cells still rendering have no links yet - leave them for the next pass
+    if (hrefs.length) cell.setAttribute(processedAttr, '1');
+    return {
+        hrefs: hrefs,
+        time: time ? time.getAttribute('datetime') : null,
+        avatar: avatar,
+        has_status: ownTextIncludes(cell, ['Following', 'Follows you']),
+        follows_you: ownTextIncludes(cell, ['Follows you']),
+        top: cell.getBoundingClientRect().top + window.scrollY
+    };
+});
+return {cells: extracted, spans: readSpans(processedAttr)};
+"""
+
+# Serializes UserCells not seen on a previous pass (marking them) so they can be parsed off the browser's critical path
+SNAPSHOT_CELLS_JS = READ_SPANS_FUNCTION_JS + """
+const [processedAttr, offsetAttr] = arguments;
+const cells = document.querySelectorAll(`[data-testid="UserCell"]:not([${processedAttr}])`);
+const html = [];
+for (const cell of cells) {
+    // Cells still rendering have no links yet - leave them for the next pass
+    if (!cell.querySelector('a[href^="/"]')) continue;
+    cell.setAttribute(processedAttr, '1');
+    cell.setAttribute(offsetAttr, cell.getBoundingClientRect().top + window.scrollY);
+    html.push(cell.outerHTML);
+}
+return {count: html.length, html: html.join('\\n'), spans: readSpans(processedAttr)};
+"""
+
+# Operations whose responses carry the following/followers list pages
+GRAPHQL_LIST_URL_PATTERN = r'/graphql/[^/?]+/(Following|Followers)\b'
+
+# Wraps fetch and XMLHttpRequest so list responses are queued in window.__xmfsCapture;
+# arguments[0] is GRAPHQL_LIST_URL_PATTERN. Must run before the list page requests its data.
+GRAPHQL_CAPTURE_HOOK_JS = """
+if (!window.__xmfsCapture) {
+    window.__xmfsCapture = [];
+    const pattern = new RegExp(arguments[0]);
+    const record = (url, body) => { if (pattern.test(url)) window.__xmfsCapture.push({url: url, body: body}); };
+    
+    const originalFetch = window.fetch;
+    window.fetch = function(...args) {
+        return originalFetch.apply(this, args).then(response => {
+            try {
+                const url = typeof args[0] === 'string' ? args[0] : (args[0].url || String(args[0]));
+                if (pattern.test(url)) response.clone().text().then(body => record(url, body)).catch(() => {});
+            } catch (e) {}
+            return response;
+        });
+    };
+    
+    const originalOpen = XMLHttpRequest.prototype.open;
+    const originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.open = function(method, url, ...rest) {
+        this.__xmfsUrl = String(url);
+        return originalOpen.call(this, method, url, ...rest);
+    };
+    XMLHttpRequest.prototype.send = function(...args) {
+        this.addEventListener('load', () => {
+            try {
+                const body = this.responseType === 'json' ? JSON.stringify(this.response) : this.responseText;
+                record(this.__xmfsUrl, body);
+            } catch (e) {}
+        });
+        return originalSend.apply(this, args);
+    };
+}
+return true;
+"""
+
+def summarize_timings(samples):
+    """Count, total and percentiles of a list of durations in seconds"""
+    ordered = sorted(samples)
+    percentile = lambda fraction: ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+    return {
+        'count': len(ordered),
+        'total': sum(ordered),
+        'mean': sum(ordered) / len(ordered),
+        'p50': percentile(0.5),
+        'p95': percentile(0.95),
+        'max': ordered[-1]
+    }
+
+class RunMetrics:
+    """Phase timings, per-operation durations, HTTP counters and rate-limit events for one run
+    (WebDriver commands are counted on each driver by install_command_counter)"""
+    
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        self.started_at = time.strftime('%Y-%m-%d %H:%M:%S')
+        self.lock = threading.Lock()
+        self.phases = {}  # Phase name -> seconds, in the order first entered
+        self.current_phase = None
+        self.phase_started = None
+        self.timings = {}  # Operation name -> list of durations
+        self.http_statuses = {}
+        self.http_bytes_received = 0
+        self.rate_limit_events = []
+        self.drivers = []
+    
+    def enter_phase(self, name):
+        """Close the running phase and start timing name (None just closes it)"""
+        with self.lock:
+            now = self.clock()
+            if self.current_phase is not None:
+                self.phases[self.current_phase] = self.phases.get(self.current_phase, 0.0) + now - self.phase_started
+            self.current_phase = name
+            self.phase_started = now
+    
+    def observe(self, name, seconds):
+        with self.lock:
+            self.timings.setdefault(name, []).append(seconds)
+    
+    def record_rate_limit(self, limiter_name, reason):
+        with self.lock:
+            self.rate_limit_events.append({'at': round(self.clock() - self.started, 3), 'limiter': limiter_name, 'reason': reason})
+    
+    def record_http_response(self, response, *args, **kwargs):
+        """requests response hook - counts responses by status and body bytes"""
+        with self.lock:
+            self.http_statuses[response.status_code] = self.http_statuses.get(response.status_code, 0) + 1
+            self.http_bytes_received += len(response.content)
+            self.timings.setdefault('http_request', []).append(response.elapsed.total_seconds())
+    
+    def summary(self):
+        """Everything measured so far as a JSON-ready dict"""
+        commands, command_seconds, sent, received = {}, {}, 0, 0
+        for driver in self.drivers:
+            for command, count in driver.command_stats.items():
+                if command != 'total':
+                    commands[command] = commands.get(command, 0) + count
+            for command, seconds in driver.command_seconds.items():
+                command_seconds[command] = command_seconds.get(command, 0.0) + seconds
+            sent += driver.transfer_stats['sent']
+            received += driver.transfer_stats['received']
+        with self.lock:
+            phases = dict(self.phases)
+            if self.current_phase is not None:
+                phases[self.current_phase] = phases.get(self.current_phase, 0.0) + self.clock() - self.phase_started
+            timings = {name: summarize_timings(samples) for name, samples in self.timings.items()}
+            return {
+                'started_at': self.started_at,
+                'wall_seconds': self.clock() - self.started,
+                'phases': phases,
+                'timings': timings,
+                'webdriver': {
+                    'browsers': len(self.drivers),
+                    'commands': commands,
+                    'command_seconds': command_seconds,
+                    'bytes_sent': sent,
+                    'bytes_received': received
+                },
+                'http': {
+                    'responses': dict(self.http_statuses),
+                    'bytes_received': self.http_bytes_received
+                },
+                'rate_limiters': {limiter.name: {
+                    'interval': 1 / limiter.rate,
+                    'successes': limiter.successes,
+                    'throttles': limiter.throttles,
+                    'seconds_waited': limiter.time_waited
+                } for limiter in (navigation_limiter, scroll_limiter, image_limiter)},
+                'rate_limit_events': list(self.rate_limit_events)
+            }
+    
+    def write(self, summary):
+        """Write summary to METRICS_FILE and METRICS_PROM_FILE"""
+        try:
+            if METRICS_FILE:
+                with open(METRICS_FILE, 'w', encoding='utf-8') as f:
+                    json.dump(summary, f, indent=2)
+            if METRICS_PROM_FILE:
+                with open(METRICS_PROM_FILE, 'w', encoding='utf-8') as f:
+                    f.write(prometheus_text(summary))
+        except OSError as e:
+            print(f"[!?] Failed to write run metrics: {e}")
+    
+    def report(self, summary):
+        """Print where the run's time went"""
+        wall = max(summary['wall_seconds'], 1e-6)
+        print(f'\n=== TIME BREAKDOWN ({wall:.0f}s) ===')
+        for phase, seconds in summary['phases'].items():
+            print(f'{phase:<24} {seconds:>9.1f}s {seconds / wall:>6.1%}')
+        for name, timing in summary['timings'].items():
+            print(f"{name:<24} {timing['count']:>7} x  mean {timing['mean']:.3f}s  p95 {timing['p95']:.3f}s  max {timing['max']:.3f}s")
+        webdriver = summary['webdriver']
+        slowest = sorted(webdriver['command_seconds'].items(), key=lambda item: item[1], reverse=True)[:5]
+        print(f"[!] WebDriver: {sum(webdriver['commands'].values())} commands in {sum(webdriver['command_seconds'].values()):.1f}s, "
+              f"{webdriver['bytes_received'] / 1024 / 1024:.1f} MB received - slowest: "
+              + ', '.join(f"{command} {seconds:.1f}s/{webdriver['commands'].get(command, 0)}" for command, seconds in slowest))
+        http = summary['http']
+        if http['responses']:
+            statuses = ', '.join(f'{status}: {count}' for status, count in sorted(http['responses'].items()))
+            print(f"[!] HTTP: {sum(http['responses'].values())} responses ({statuses}), {http['bytes_received'] / 1024 / 1024:.1f} MB")
+        if summary['rate_limit_events']:
+            print(f"[!] Rate-limit events: {len(summary['rate_limit_events'])} - "
+                  + ', '.join(f"{name} {limiter['throttles']}" for name, limiter in summary['rate_limiters'].items()))
+        if METRICS_FILE or METRICS_PROM_FILE:
+            print(f"[!] Metrics saved to: {', '.join(path for path in (METRICS_FILE, METRICS_PROM_FILE) if path)}")
+
+def prometheus_label(value):
+    """Escape a label value for the Prometheus text format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def prometheus_text(summary):
+    """Render a metrics summary in the Prometheus text exposition format"""
+    lines = []
+    
+    def metric(name, kind, help_text, samples):
+        lines.append(f'# HELP xmfs_{name} {help_text}')
+        lines.append(f'# TYPE xmfs_{name} {kind}')
+        for labels, value in samples:
+            label_text = ','.join(f'{key}="{prometheus_label(label)}"' for key, label in labels.items())
+            lines.append(f'xmfs_{name}{{{label_text}}} {value}' if label_text else f'xmfs_{name} {value}')
+    
+    webdriver, http = summary['webdriver'], summary['http']
+    metric('run_seconds', 'gauge', 'Wall time of the run', [({}, summary['wall_seconds'])])
+    metric('phase_seconds', 'gauge', 'Wall time spent in each phase of the run',
+           [({'phase': phase}, seconds) for phase, seconds in summary['phases'].items()])
+    metric('webdriver_commands_total', 'counter', 'WebDriver round trips by command',
+           [({'command': command}, count) for command, count in webdriver['commands'].items()])
+    metric('webdriver_command_seconds_total', 'counter', 'Time spent waiting on WebDriver commands',
+           [({'command': command}, seconds) for command, seconds in webdriver['command_seconds'].items()])
+    metric('webdriver_bytes_total', 'counter', 'Approximate WebDriver payload bytes',
+           [({'direction': 'sent'}, webdriver['bytes_sent']), ({'direction': 'received'}, webdriver['bytes_received'])])
+    metric('http_responses_total', 'counter', 'HTTP responses to avatar downloads by status',
+           [({'status': status}, count) for status, count in http['responses'].items()])
+    metric('http_bytes_received_total', 'counter', 'HTTP response body bytes', [({}, http['bytes_received'])])
+    metric('rate_limit_events_total', 'counter', 'Rate-limit signals acted on, by limiter',
+           [({'limiter': name}, limiter['throttles']) for name, limiter in summary['rate_limiters'].items()])
+    metric('rate_limiter_interval_seconds', 'gauge', 'Current interval between requests, by limiter',
+           [({'limiter': name}, limiter['interval']) for name, limiter in summary['rate_limiters'].items()])
+    metric('rate_limiter_wait_seconds_total', 'counter', 'Time spent waiting on a limiter',
+           [({'limiter': name}, limiter['seconds_waited']) for name, limiter in summary['rate_limiters'].items()])
+    lines.append('# HELP xmfs_operation_seconds Duration of individual operations')
+    lines.append('# TYPE xmfs_operation_seconds summary')
+    for name, timing in summary['timings'].items():
+        for quantile in ('p50', 'p95'):
+            lines.append(f'xmfs_operation_seconds{{operation="{name}",quantile="0.{quantile[1:]}"}} {timing[quantile]}')
+        lines.append(f'xmfs_operation_seconds_sum{{operation="{name}"}} {timing["total"]}')
+        lines.append(f'xmfs_operation_seconds_count{{operation="{name}"}} {timing["count"]}')
+    return '\n'.join(lines) + '\n'
+
+class AdaptiveRateLimiter:
+    """Token bucket whose refill rate is tuned by AIMD - creeps up while requests succeed, halves on throttling"""
+    
+    def __init__(self, name, initial_rate, max_speedup=RATE_LIMIT_MAX_SPEEDUP, max_slowdown=RATE_LIMIT_MAX_SLOWDOWN,
+                 increase=RATE_LIMIT_INCREASE, decrease=RATE_LIMIT_DECREASE, cooldown=RATE_LIMIT_COOLDOWN,
+                 burst=1, clock=time.monotonic, sleep=time.sleep):
+        self.name = name
+        self.rate = initial_rate  # Requests per second
+        self.min_rate = initial_rate / max_slowdown
+        self.max_rate = initial_rate * max_speedup
+        self.increase = initial_rate * increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = burst
+        self.last_refill = clock()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+        self.successes = 0
+        self.throttles = 0
+        self.time_waited = 0.0
+    
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+    
+    def acquire(self):
+        """Block until the next request of this kind may be sent"""
+        while True:
+            with self.lock:
+                now = self.clock()
+                self._refill(now)
+                # Small tolerance so float rounding can't leave us sleeping for nanoseconds forever
+                if now >= self.blocked_until - 1e-6 and self.tokens >= 1 - 1e-9:
+                    self.tokens = max(0.0, self.tokens - 1)
+                    return
+                wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+                self.time_waited += wait
+            self.sleep(wait)
+    
+    def on_success(self):
+        """Additive increase after a clean response"""
+        with self.lock:
+            self.successes += 1
+            self.rate = min(self.max_rate, self.rate + self.increase)
+    
+    def on_throttle(self, reason):
+        """Multiplicative decrease plus a cooldown after a rate-limit signal"""
+        with self.lock:
+            now = self.clock()
+            if now < self.blocked_until:
+                return  # Already backing off from this episode (e.g. reported by several workers)
+            self.throttles += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.tokens = 0
+            self.blocked_until = now + self.cooldown
+        metrics.record_rate_limit(self.name, reason)
+        print(f"[!?] Rate limited ({self.name}): {reason} - backing off to {1 / self.rate:.1f}s between requests "
+              f"after a {self.cooldown}s pause")
+    
+    def report(self):
+        print(f"[!] {self.name} rate limiter: {1 / self.rate:.2f}s interval, {self.successes} clean responses, "
+              f"{self.throttles} rate-limit events, {self.time_waited:.0f}s spent waiting")
+
+# Shared by every navigation, scroll and image download so throughput tracks what the site allows
+navigation_limiter = AdaptiveRateLimiter('navigation', 1 / PROFILE_CHECK_DELAY)
+scroll_limiter = AdaptiveRateLimiter('scroll', 1 / SCROLL_PAUSE_TIME)
+image_limiter = AdaptiveRateLimiter('image', 5.0, burst=5)
+metrics = RunMetrics()
+
+# Returns a short reason string when the page is showing a rate-limit or failed-timeline screen
+RATE_LIMIT_PROBE_JS = """
+const text = (document.body ? document.body.innerText : '').toLowerCase();
+if (text.includes('rate limit exceeded')) return 'rate limit exceeded page';
+if (text.includes('something went wrong') && document.querySelector('[role="button"], button') &&
+    Array.from(document.querySelectorAll('[role="button"], button')).some(b => /retry|try again/i.test(b.innerText))) {
+    return 'empty timeline with retry prompt';
+}
+return null;
+"""
+
+def detect_rate_limit(driver):
+    """Return a reason string if the current page shows a rate-limit signal, else None"""
+    try:
+        return driver.execute_script(RATE_LIMIT_PROBE_JS)
+    except Exception:
+        return None
+
+def navigate(driver, url, ready_selector='[data-testid="primaryColumn"]', attempts=3):
+    """Load url through the navigation rate limiter, backing off and retrying if the site throttles us"""
+    for attempt in range(1, attempts + 1):
+        navigation_limiter.acquire()
+        started = time.perf_counter()
+        driver.get(url)
+        try:
+            WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, ready_selector)))
+        except TimeoutException:
+            pass  # The probe below tells throttling apart from a page that is just slow or different
+        metrics.observe('page_load', time.perf_counter() - started)
+        
+        reason = detect_rate_limit(driver)
+        if not reason:
+            navigation_limiter.on_success()
+            return True
+        navigation_limiter.on_throttle(reason)
+        print(f"     [!] Retrying {url} (attempt {attempt}/{attempts})")
+    return False
 
-# --- SETUP ---
-os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+def intern_optional(text):
+    """sys.intern that lets None through"""
+    return sys.intern(text) if text is not None else None
 
-def setup_driver():
-    """Setup Firefox WebDriver with optimal settings for Twitter scraping"""
-    print("[!] Setting up Firefox WebDriver...")
+class UserRecord:
+    """One followed account, carried from list collection through profile checks to the output without re-copying"""
+    __slots__ = ('username', 'position', 'follow_date', 'has_status_indicator', 'follows_you', 'profile_pic_url',
+                 'pic_downloaded', 'filename', 'number')
+    
+    def __init__(self, username, position, follow_date=None, has_status_indicator=False, follows_you=False,
+                 profile_pic_url=None, pic_downloaded=False, filename=None, number=None):
+        # Interned so lists that mention the same account (following + followers) share one string
+        self.username = sys.intern(username)
+        self.position = position
+        self.follow_date = follow_date  # None means only the list position is known
+        self.has_status_indicator = has_status_indicator
+        self.follows_you = follows_you
+        self.profile_pic_url = intern_optional(profile_pic_url)  # Default avatars are shared by many accounts
+        self.pic_downloaded = pic_downloaded  # None while a queued download hasn't finished
+        self.filename = filename  # Avatar file in DOWNLOAD_DIR, temporary until the results are numbered
+        self.number = number  # Rank in the final results, oldest follow first
+    
+    @property
+    def follow_date_text(self):
+        return self.follow_date or f"position_{self.position}"
+    
+    def to_dict(self):
+        """Checkpoint form, read back by from_dict"""
+        return {name: getattr(self, name) for name in self.__slots__}
+    
+    @classmethod
+    def from_dict(cls, data):
+        # Checkpoints from before records existed called the file temp_filename
+        filename = data.get('filename', data.get('temp_filename'))
+        follow_date = data.get('follow_date')
+        if follow_date == f"position_{data['position']}":
+            follow_date = None
+        return cls(data['username'], data['position'], follow_date, data.get('has_status_indicator', False),
+                   data.get('follows_you', False), data.get('profile_pic_url'), data.get('pic_downloaded', False),
+                   filename, data.get('number'))
+    
+    def to_result(self):
+        """Output form for the results JSON and JSONL"""
+        result = {} if self.number is None else {'number': self.number}
+        result.update({
+            'username': self.username,
+            'handle': f'@{self.username}',
+            'follow_date': self.follow_date_text,
+            'original_position': self.position,
+            'profile_pic_url': self.profile_pic_url,
+            'pic_downloaded': self.pic_downloaded,
+            'filename': self.filename if self.pic_downloaded else None
+        })
+        return result
+    
+    @staticmethod
+    def json_default(obj):
+        """json.dump default= hook that writes records in their checkpoint form"""
+        if isinstance(obj, UserRecord):
+            return obj.to_dict()
+        raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+class CollectedUsers(list):
+    """Ordered list of collected user records with an O(1) username index and a seen-href set"""
+    
+    def __init__(self, users=()):
+        super().__init__()
+        self.by_username = {}
+        self.seen_hrefs = set()
+        self.offsets = {}  # Username -> page position of its row, while the list is being scrolled
+        self.complete = False  # Set once scrolling reached the end of the list (or its cached copy)
+        self.joined_cache = False  # Set when the part below the join came from the cached copy (--incremental)
+        for user in users:
+            self.append(user)
+    
+    def append(self, user, href=None):
+        super().append(user)
+        self.by_username[user.username] = user
+        if href:
+            self.seen_hrefs.add(href)
+    
+    def has_user(self, username):
+        """Check whether a username has already been collected"""
+        return username in self.by_username
+    
+    def sort_by_offset(self):
+        """Put users in on-page row order and renumber their positions, returns True if the order changed"""
+        if not self or len(self.offsets) < len(self):
+            return False  # Some rows came without a position (e.g. link fallbacks) - keep collection order
+        ordered = sorted(self, key=lambda user: self.offsets[user.username])
+        if all(a is b for a, b in zip(ordered, self)):
+            return False
+        self[:] = ordered
+        for position, user in enumerate(self):
+            user.position = position
+        return True
+
+def setup_driver(lean=None):
+    """Setup Firefox WebDriver with optimal settings for Twitter scraping (lean defaults to LEAN_BROWSER)"""
+    if lean is None:
+        lean = LEAN_BROWSER
+    print(f"[!] Setting up {'lean headless ' if lean else ''}Firefox WebDriver...")
     
     try:
-        service = Service(GeckoDriverManager().install())
-        print("[+] GeckoDriver installed/updated successfully")
+        service = Service(resolve_geckodriver_path())
     except Exception as e:
         print(f"[!] WebDriverManager failed, trying default GeckoDriver: {e}")
         service = None
@@ -56,6 +628,8 @@ def setup_driver():
     firefox_options.set_preference('browser.cache.disk.enable', False)
     firefox_options.set_preference('browser.cache.memory.enable', False)
     firefox_options.set_preference('browser.sessionstore.max_tabs_undo', 0)
+    if lean:
+        apply_lean_preferences(firefox_options)
 
     try:
         if service:
@@ -64,6 +638,7 @@ def setup_driver():
             driver = webdriver.Firefox(options=firefox_options)
         
         driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        install_command_counter(driver)
         print("[+] Firefox browser launched successfully")
         return driver
         
@@ -76,6 +651,173 @@ def setup_driver():
         print("4. If you don't have Firefox, download it from: https://www.mozilla.org/firefox/")
         raise
 
+def apply_lean_preferences(firefox_options):
+    """Run headless and stop Firefox fetching what the scraper never looks at"""
+    firefox_options.add_argument('-headless')
+    # Blocked images keep their src attribute, which is all the avatar extraction reads
+    firefox_options.set_preference('permissions.default.image', 2)
+    firefox_options.set_preference('media.autoplay.default', 5)  # Block all autoplay, audible or not
+    firefox_options.set_preference('media.preload.default', 0)
+    firefox_options.set_preference('media.preload.auto', 0)
+    firefox_options.set_preference('gfx.downloadable_fonts.enabled', False)
+    firefox_options.set_preference('browser.display.use_document_fonts', 0)
+    firefox_options.set_preference('privacy.trackingprotection.enabled', True)
+    if LEAN_BLOCKED_HOSTS:
+        firefox_options.set_preference('network.dns.localDomains', ','.join(LEAN_BLOCKED_HOSTS))
+
+def resolve_geckodriver_path():
+    """Return the geckodriver binary, reusing the cached path instead of asking WebDriverManager every run"""
+    try:
+        with open(GECKODRIVER_PATH_CACHE, 'r', encoding='utf-8') as f:
+            cached_path = f.read().strip()
+        if os.path.isfile(cached_path) and os.access(cached_path, os.X_OK):
+            print(f"[+] Using cached GeckoDriver at {cached_path}")
+            return cached_path
+    except OSError:
+        pass
+    
+    driver_path = GeckoDriverManager().install()
+    print("[+] GeckoDriver installed/updated successfully")
+    try:
+        with open(GECKODRIVER_PATH_CACHE, 'w', encoding='utf-8') as f:
+            f.write(driver_path)
+    except OSError as e:
+        print(f"[!] Could not cache the GeckoDriver path: {e}")
+    return driver_path
+
+def install_command_counter(driver):
+    """Wrap driver.execute so every WebDriver round trip is counted in driver.command_stats, timed in
+    driver.command_seconds and its approximate JSON payload size added to driver.transfer_stats"""
+    original_execute = driver.execute
+    driver.command_stats = {'total': 0}
+    driver.command_seconds = {}
+    driver.transfer_stats = {'sent': 0, 'received': 0}
+    metrics.drivers.append(driver)
+    
+    def counting_execute(driver_command, params=None):
+        driver.command_stats['total'] += 1
+        driver.command_stats[driver_command] = driver.command_stats.get(driver_command, 0) + 1
+        started = time.perf_counter()
+        try:
+            response = original_execute(driver_command, params)
+        finally:
+            driver.command_seconds[driver_command] = driver.command_seconds.get(driver_command, 0.0) + time.perf_counter() - started
+        # Re-encoding approximates the wire size; WebElements are stand-ins for their small reference objects
+        if params:
+            driver.transfer_stats['sent'] += len(json.dumps(params, default=str))
+        if response:
+            driver.transfer_stats['received'] += len(json.dumps(response.get('value'), default=str))
+        return response
+    
+    # WebElement calls go through their parent's execute too, so this sees every command
+    driver.execute = counting_execute
+
+def get_command_count(driver):
+    """Return the number of WebDriver round trips made so far (0 if not instrumented)"""
+    return getattr(driver, 'command_stats', {}).get('total', 0)
+
+def get_bytes_received(driver):
+    """Return the approximate bytes WebDriver responses have carried so far (0 if not instrumented)"""
+    return getattr(driver, 'transfer_stats', {}).get('received', 0)
+
+# Looks for phrases in the rendered text of the first scope found, so only the match crosses the wire
+# rather than the whole serialized DOM; a marker element short-circuits the text search
+PAGE_TEXT_PROBE_JS = """
+const [needles, scopes, marker] = arguments;
+if (marker && document.querySelector(marker)) return marker;
+let scope = null;
+for (const selector of scopes) {
+    scope = document.querySelector(selector);
+    if (scope) break;
+}
+scope = scope || document.body;
+const text = (scope ? scope.innerText : '').toLowerCase();
+return needles.find(needle => text.includes(needle)) || null;
+"""
+
+def find_page_text(driver, needles, scopes=('[data-testid="primaryColumn"]',), marker=None):
+    """Return the first of needles (lowercase) shown on the page, or marker if that element exists, else None"""
+    return driver.execute_script(PAGE_TEXT_PROBE_JS, list(needles), list(scopes), marker)
+
+LOGGED_IN_SELECTORS = [
+    '[data-testid="SideNav_AccountSwitcher_Button"]',
+    '[data-testid="AppTabBar_Profile_Link"]',
+    '[aria-label="Profile"]',
+    '[data-testid="primaryColumn"]',
+    '[data-testid="composeTweet"]',
+    '[aria-label="Home timeline"]'
+]
+
+def add_cookies(driver, cookies):
+    """Add saved cookies to driver - it has to be showing a page on X_BASE_URL already"""
+    for cookie in cookies:
+        try:
+            driver.add_cookie(cookie)
+        except WebDriverException:
+            # Host-only cookies sometimes refuse an explicit domain
+            driver.add_cookie({key: value for key, value in cookie.items() if key not in ('domain', 'sameSite')})
+
+def save_session(driver):
+    """Write the logged-in cookies and localStorage to SESSION_FILE so the next run can skip login"""
+    if not SESSION_FILE:
+        return
+    try:
+        session = {
+            'base_url': X_BASE_URL,
+            'saved_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'cookies': driver.get_cookies(),
+            'local_storage': driver.execute_script("return Object.assign({}, window.localStorage);")
+        }
+        temp_path = f'{SESSION_FILE}.tmp'
+        # Owner-only, the cookies are as good as a password while they last
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(session, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, SESSION_FILE)
+        print(f"[+] Login session saved to {SESSION_FILE}")
+    except (OSError, WebDriverException) as e:
+        print(f"[!?] Failed to save login session: {e}")
+
+def restore_session(driver):
+    """Load SESSION_FILE into the browser and probe whether it is still logged in, returns True if so"""
+    if not SESSION_FILE:
+        return False
+    try:
+        with open(SESSION_FILE, 'r', encoding='utf-8') as f:
+            session = json.load(f)
+    except FileNotFoundError:
+        return False
+    except (OSError, ValueError) as e:
+        print(f"[!?] Ignoring unreadable session file {SESSION_FILE}: {e}")
+        return False
+    if session.get('base_url') != X_BASE_URL:
+        print(f"[!] Saved session is for {session.get('base_url')}, not {X_BASE_URL} - logging in again")
+        return False
+    
+    print(f"[!] Restoring login session saved {session['saved_at']}...")
+    try:
+        # Cookies and localStorage can only be set for the site that is currently loaded
+        driver.get(f'{X_BASE_URL}/favicon.ico')
+        add_cookies(driver, session['cookies'])
+        driver.execute_script(
+            "for (const [key, value] of Object.entries(arguments[0])) window.localStorage.setItem(key, value);",
+            session.get('local_storage') or {})
+        
+        navigate(driver, f'{X_BASE_URL}/home', attempts=1)
+        if 'login' not in driver.current_url.lower():
+            for selector in LOGGED_IN_SELECTORS:
+                if driver.find_elements(By.CSS_SELECTOR, selector):
+                    print("[+] Saved session is still valid - skipping manual login")
+                    return True
+    except WebDriverException as e:
+        print(f"[!?] Could not restore login session: {e}")
+        return False
+    
+    print("[!] Saved session has expired - manual login required")
+    return False
+
 def login_to_twitter(driver):
     """Navigate to Twitter login and wait for user to log in manually"""
     print("\n[!] LOGIN REQUIRED")
@@ -86,7 +828,7 @@ def login_to_twitter(driver):
     print("=" * 50)
     
     # Navigate to login page
-    driver.get('https://x.com/login')
+    driver.get(f'{X_BASE_URL}/login')
     
     # Wait for user to log in automatically by checking for login success
     print("\n[!] Please log in to X/Twitter in the browser window...")
@@ -103,16 +845,7 @@ def login_to_twitter(driver):
             
             if 'login' not in current_url:
                 try:
-                    logged_in_elements = [
-                        '[data-testid="SideNav_AccountSwitcher_Button"]',
-                        '[data-testid="AppTabBar_Profile_Link"]', 
-                        '[aria-label="Profile"]',
-                        '[data-testid="primaryColumn"]',
-                        '[data-testid="composeTweet"]',
-                        '[aria-label="Home timeline"]'
-                    ]
-                    
-                    for selector in logged_in_elements:
+                    for selector in LOGGED_IN_SELECTORS:
                         try:
                             element = WebDriverWait(driver, 3).until(
                                 EC.presence_of_element_located((By.CSS_SELECTOR, selector))
@@ -124,10 +857,10 @@ def login_to_twitter(driver):
                             continue
                     
                     print("[!] Not on login page but no login elements found. Trying home page...")
-                    driver.get('https://x.com/home')
+                    driver.get(f'{X_BASE_URL}/home')
                     time.sleep(5)
                     
-                    for selector in logged_in_elements:
+                    for selector in LOGGED_IN_SELECTORS:
                         try:
                             element = WebDriverWait(driver, 3).until(
                                 EC.presence_of_element_located((By.CSS_SELECTOR, selector))
@@ -153,24 +886,192 @@ def login_to_twitter(driver):
     print("[!?] Login timeout. Please make sure you're logged in and try again.")
     return False
 
-def scroll_and_collect_users_with_dates(driver, page_type="followers"):
-    """Scroll through a list and collect user handles with their follow dates - complete single pass"""
-    users_data = []
-    last_height = driver.execute_script("return document.body.scrollHeight")
-    no_new_users_count = 0
-    stagnant_height_count = 0
+# Scrolls the viewport top to arguments[0] and reports what it found. At the end of the list it resolves as soon
+# as the list grows, once it has been quiet with no loader spinner for settle ms (end of list) or after timeout ms
+# (still loading / stuck); mid-list it only gives rows step ms to mount. The page-coordinate span of the mounted
+# UserCells comes back too - DOM extraction reports the spans it actually read instead, graphql mode uses this one
+SCROLL_STEP_JS = """
+const [target, timeoutMs, settleMs, stepMs, done] = arguments;
+const column = () => document.querySelector('[data-testid="primaryColumn"]') || document;
+const loading = () => !!column().querySelector('[role="progressbar"]');
+const atBottom = () => window.scrollY + window.innerHeight >= document.body.scrollHeight - 2;
+const snapshot = () => {
+    const cells = document.querySelectorAll('[data-testid="UserCell"]');
+    const link = cells.length ? cells[cells.length - 1].querySelector('a[href^="/"]') : null;
+    return {count: cells.length, last: link ? link.getAttribute('href') : null};
+};
+const mountedSpan = () => {
+    let top = Infinity, bottom = -Infinity;
+    for (const cell of document.querySelectorAll('[data-testid="UserCell"]')) {
+        const rect = cell.getBoundingClientRect();
+        top = Math.min(top, rect.top + window.scrollY);
+        bottom = Math.max(bottom, rect.bottom + window.scrollY);
+    }
+    return top <= bottom ? [top, bottom] : null;
+};
+const before = snapshot();
+let finished = false, settleTimer = null, timeoutTimer = null, observer = null, bottom = false;
+const finish = (reason) => {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    clearTimeout(settleTimer);
+    clearTimeout(timeoutTimer);
+    done({reason: reason, loading: loading(), atBottom: atBottom(), span: mountedSpan(), scrollY: window.scrollY,
+          viewport: window.innerHeight, height: document.body.scrollHeight});
+};
+const check = () => {
+    const now = snapshot();
+    if (now.count !== before.count || now.last !== before.last) return finish('rows');
+    clearTimeout(settleTimer);
+    if (!bottom) settleTimer = setTimeout(() => finish('stepped'), stepMs);
+    else if (!loading()) settleTimer = setTimeout(() => finish('idle'), settleMs);
+};
+observer = new MutationObserver(check);
+observer.observe(document.body, {childList: true, subtree: true, attributes: true, attributeFilter: ['role']});
+timeoutTimer = setTimeout(() => finish('timeout'), timeoutMs);
+window.scrollTo(0, target);
+bottom = atBottom();
+check();
+"""
+
+def scroll_and_wait_for_rows(driver, target):
+    """Scroll the viewport top to target and block until rows mount, the list goes idle, or SCROLL_WAIT_TIMEOUT passes"""
+    started = time.perf_counter()
+    try:
+        return driver.execute_async_script(SCROLL_STEP_JS, target, int(SCROLL_WAIT_TIMEOUT * 1000),
+                                           int(SCROLL_SETTLE_TIME * 1000), int(SCROLL_STEP_WAIT * 1000))
+    except TimeoutException:
+        return {'reason': 'timeout', 'loading': True, 'atBottom': True, 'span': None,
+                'scrollY': target, 'viewport': 0, 'height': 0}
+    finally:
+        metrics.observe('scroll_wait', time.perf_counter() - started)
+
+class ScrollCoverage:
+    """Page-coordinate spans of a list that were mounted while its cells were being collected, merged as they grow"""
+    
+    def __init__(self, tolerance=2):
+        self.spans = []  # Sorted, non-overlapping [start, end] pairs
+        self.tolerance = tolerance  # Rows this close together count as touching (borders, rounding)
+    
+    def add(self, span):
+        if not span:
+            return
+        start, end = span
+        merged = []
+        for span_start, span_end in self.spans:
+            if span_end + self.tolerance < start or end + self.tolerance < span_start:
+                merged.append([span_start, span_end])
+            else:
+                start, end = min(start, span_start), max(end, span_end)
+        merged.append([start, end])
+        self.spans = sorted(merged)
+    
+    def reach(self, position):
+        """End of the last covered span that starts at or above position, None if there is none"""
+        ends = [end for start, end in self.spans if start <= position]
+        return ends[-1] if ends else None
+    
+    def gaps(self):
+        """Stretches between covered spans that were never read"""
+        return [(end, next_start) for (_, end), (next_start, _) in zip(self.spans, self.spans[1:])]
+
+def next_scroll_target(coverage, state):
+    """Viewport top for the next step: just above the end of what has been read, so no row is skipped"""
+    viewport = state['viewport'] or 600
+    frontier = coverage.reach(state['scrollY'] + viewport)
+    if frontier is not None and frontier - viewport * SCROLL_STEP_OVERLAP > state['scrollY'] + 1:
+        return int(frontier - viewport * SCROLL_STEP_OVERLAP)
+    # Nothing mounted below the viewport - step a viewport down to make the list render or load more
+    return int(state['scrollY'] + viewport * (1 - SCROLL_STEP_OVERLAP))
+
+def fill_coverage_gaps(driver, users_data, coverage, viewport, snapshot_parser=None):
+    """Scroll back to stretches of the list that were unmounted before they were read, returns the scrolls made"""
+    scrolls = 0
+    unreachable = set()
+    while True:
+        gaps = [gap for gap in coverage.gaps() if gap not in unreachable]
+        if not gaps:
+            return scrolls
+        start, end = gaps[0]
+        scrolls += 1
+        print(f"[!] Revisiting unread rows at {start:.0f}-{end:.0f}px")
+        state = scroll_and_wait_for_rows(driver, max(0, int(start - viewport * SCROLL_STEP_OVERLAP)))
+        collect_visible_users(driver, users_data, snapshot_parser, coverage, state['span'])
+        if (start, end) in coverage.gaps():
+            unreachable.add((start, end))  # Nothing renders there (e.g. a section header) - don't try again
+
+class PreviousListAnchor:
+    """Finds where a newest-first list joins the previous run's copy: INCREMENTAL_MATCH_RUN known users in a row,
+    in the same order as before, means everything below them is unchanged"""
+    
+    def __init__(self, previous_users, run_length=INCREMENTAL_MATCH_RUN):
+        self.previous = previous_users
+        self.index = {user.username.lower(): i for i, user in enumerate(previous_users)}
+        self.run_length = run_length
+        self.checked = 0
+        self.run = 0
+        self.last_index = None
+        self.matched_index = None  # Previous-list index of the last user of the matching run
+    
+    def feed(self, users_data):
+        """Check the users collected since the last call, returns True once the list has joined the cache"""
+        while self.matched_index is None and self.checked < len(users_data):
+            index = self.index.get(users_data[self.checked].username.lower())
+            self.checked += 1
+            if index is None:
+                self.run = 0
+            elif self.run and index == self.last_index + 1:
+                self.run += 1
+            else:
+                self.run = 1
+            self.last_index = index
+            if self.run >= self.run_length:
+                self.matched_index = index
+        return self.matched_index is not None
+    
+    def merge_tail(self, users_data):
+        """Append the cached users below the join that weren't collected this run, returns how many"""
+        users_data.joined_cache = True
+        added = 0
+        for user in self.previous[self.matched_index + 1:]:
+            if not users_data.has_user(user.username):
+                user.position = len(users_data)
+                # Badges were read on an earlier run - drop them so follow-back status is checked, not trusted stale
+                user.follows_you = False
+                user.has_status_indicator = False
+                users_data.append(user)
+                added += 1
+        return added
+
+def scroll_and_collect_users_with_dates(driver, page_type="followers", previous_users=None):
+    """Scroll through a list in viewport steps and collect user handles with their follow dates, revisiting any
+    rows a virtualized list unmounted before they were read. With previous_users (the last run's copy, newest
+    first), scrolling stops where the list joins it and the rest is taken from the copy"""
+    users_data = CollectedUsers()
+    anchor = PreviousListAnchor(previous_users) if previous_users else None
+    snapshot_parser = SnapshotParser(users_data, page_type) if CELL_EXTRACTION_MODE == 'snapshot' else None
+    # Link scraping would mix unrelated links into graphql results, and would race the snapshot parser thread
+    use_fallback_selectors = LIST_INGESTION_MODE != 'graphql' and snapshot_parser is None
+    start_commands = get_command_count(driver)
+    start_bytes = get_bytes_received(driver)
+    coverage = ScrollCoverage()
+    idle_count = 0
+    stalled_count = 0
     scroll_count = 0
+    # The in-page wait has its own timeout, this only has to outlast it
+    driver.set_script_timeout(SCROLL_WAIT_TIMEOUT + 5)
     
-    print(f"[!] Starting comprehensive single-pass scroll through {page_type} list...")
+    print(f"[!] Starting viewport-stepped scroll through {page_type} list...")
     
     print("[!] Collecting initially visible users before scrolling...")
+    # The page is already at the top - this only reports where the first rows are
+    state = scroll_and_wait_for_rows(driver, 0)
     try:
-        user_cells = driver.find_elements(By.CSS_SELECTOR, '[data-testid="UserCell"]')
-        print(f"[!] Found {len(user_cells)} UserCell elements on initial view")
-        if user_cells:
-            collect_users_from_cells(user_cells, users_data)
+        cell_count = collect_visible_users(driver, users_data, snapshot_parser, coverage, state['span'])
+        print(f"[!] Found {cell_count or 0} new UserCell elements on initial view")
         
-        if len(users_data) == 0:
+        if len(users_data) == 0 and use_fallback_selectors:
             try_alternative_selectors(driver, users_data)
             
         print(f"[+] Collected {len(users_data)} users from initial view before scrolling")
@@ -178,59 +1079,73 @@ def scroll_and_collect_users_with_dates(driver, page_type="followers"):
         print(f"[!] Error collecting initial users: {e}")
     
     while True:
+        target = next_scroll_target(coverage, state)
+        # Only steps that reach the end of the loaded rows make the site fetch more, so only those are paced
+        loads_more = target + 2 * state['viewport'] >= state['height']
+        if loads_more:
+            scroll_limiter.acquire()
+        previous_y = state['scrollY']
         scroll_count += 1
-        print(f"[!] Scroll #{scroll_count} - Current users: {len(users_data)}")
+        print(f"[!] Scroll #{scroll_count} to {target}px - Current users: {len(users_data)}")
         
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(SCROLL_PAUSE_TIME)
+        wait_started = time.monotonic()
+        state = scroll_and_wait_for_rows(driver, target)
+        print(f"[!] Scroll settled as '{state['reason']}' after {time.monotonic() - wait_started:.2f}s")
         
         old_count = len(users_data)
+        cell_count = 0
         try:
             # Strategy 1: Look for UserCell elements (most reliable)
-            user_cells = driver.find_elements(By.CSS_SELECTOR, '[data-testid="UserCell"]')
-            print(f"[!] Found {len(user_cells)} UserCell elements on current view")
-            
-            collect_users_from_cells(user_cells, users_data)
+            # Only rows actually read are covered - late-rendering or failed ones stay a gap, revisited at the end
+            cell_count = collect_visible_users(driver, users_data, snapshot_parser, coverage, state['span'])
+            print(f"[!] Found {cell_count or 0} new UserCell elements on current view")
                     
             # Strategy 2: Fallback detection methods
-            if len(users_data) == old_count:
+            if len(users_data) == old_count and use_fallback_selectors and state['atBottom']:
                 print("[!] UserCell method found no new users, trying fallback methods...")
                 try_alternative_selectors(driver, users_data)
                         
         except (TimeoutException, NoSuchElementException) as e:
             print(f"[!?] Error collecting users: {e}")
         
-        # Check if we found new users
+        # Check if we found new users (snapshot cells are still being parsed, but new cells mean new users)
         new_count = len(users_data)
-        if new_count == old_count:
-            no_new_users_count += 1
-            print(f"[!] No new users found in this scroll (attempt {no_new_users_count}/3)")
-            print(f"[!] Trying a larger scroll to find more users...")
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight + 1000);")
-            time.sleep(SCROLL_PAUSE_TIME * 1.5)  
-        else:
-            no_new_users_count = 0
+        if new_count > old_count or (snapshot_parser and cell_count):
+            idle_count = 0
+            stalled_count = 0
+            if loads_more:
+                scroll_limiter.on_success()
+        elif state['atBottom']:
+            reason = detect_rate_limit(driver)
+            if reason:
+                scroll_limiter.on_throttle(reason)
+            if state['reason'] == 'idle':
+                # Nothing arrived and the loader is gone - confirm once in case the spinner hadn't mounted yet
+                idle_count += 1
+                print(f"[!] No new users and no loader spinner (check {idle_count}/2)")
+            else:
+                stalled_count += 1
+                print(f"[!] No new users after a '{state['reason']}' wait (attempt {stalled_count}/3)")
+        elif state['scrollY'] <= previous_y:
+            # Mid-list but the page wouldn't scroll any further
+            stalled_count += 1
+            print(f"[!] Page did not scroll past {previous_y}px (attempt {stalled_count}/3)")
             
         print(f"[+] Collected {len(users_data)} users so far (scroll #{scroll_count})")
         
-        new_height = driver.execute_script("return document.body.scrollHeight")
-        if new_height == last_height:
-            stagnant_height_count += 1
-            print(f"[!] Page height unchanged (attempt {stagnant_height_count}/3)")
-        else:
-            stagnant_height_count = 0
-            last_height = new_height
-            
-        if no_new_users_count >= 3 or stagnant_height_count >= 3:
-            if no_new_users_count >= 3:
-                print(f"[-] No new users found after {no_new_users_count} consecutive scrolls - stopping collection")
-            else:
-                print(f"[-] Page height unchanged after {stagnant_height_count} consecutive scrolls - likely reached end of list")
-            print(f"[+] Completed scroll with {scroll_count} total scrolls")
+        if anchor and anchor.feed(users_data):
+            print(f"[+] {anchor.run_length} users in a row match the previous run's list - the rest is unchanged")
+            users_data.complete = True
             break
-        else:
-            stagnant_height_count = 0
-            last_height = new_height
+        if idle_count >= 2:
+            print(f"[-] Loader spinner gone and no new rows - reached end of list")
+            users_data.complete = True
+            break
+        if stalled_count >= 3:
+            print(f"[-] No new users after {stalled_count} consecutive waits - stopping collection")
+            break
+        if not state['atBottom']:
+            continue  # "Show more" buttons and end-of-list text only appear at the bottom
         
         try:
             show_more_selectors = [
@@ -251,7 +1166,7 @@ def scroll_and_collect_users_with_dates(driver, page_type="followers"):
                                 if button.is_displayed() and button.is_enabled():
                                     driver.execute_script("arguments[0].click();", button)
                                     print(f"[+] Clicked 'Show more' button")
-                                    time.sleep(SCROLL_PAUSE_TIME)  # Wait for more content to load
+                                    scroll_limiter.acquire()  # Wait for more content to load
                                     break
                             except:
                                 continue
@@ -262,7 +1177,6 @@ def scroll_and_collect_users_with_dates(driver, page_type="followers"):
             
         # Additional check: try to detect "end of list" indicators
         try:
-            page_source = driver.page_source.lower()
             end_indicators = [
                 "you've reached the end",
                 "no more to show",
@@ -272,24 +1186,82 @@ def scroll_and_collect_users_with_dates(driver, page_type="followers"):
                 "end of timeline"
             ]
             
-            for indicator in end_indicators:
-                if indicator in page_source:
-                    print(f"[-] Detected end-of-list indicator: '{indicator}'")
-                    print(f"[+] Completed scroll with {scroll_count} total scrolls")
-                    return users_data
+            indicator = find_page_text(driver, end_indicators)
+            if indicator:
+                print(f"[-] Detected end-of-list indicator: '{indicator}'")
+                users_data.complete = True
+                break
                     
         except Exception:
             pass
-        
-        # Safety valve: if we've scrolled excessively (100+ times), something might be wrong
-        if scroll_count > 100:
-            print(f"[-] Safety stop at {scroll_count} scrolls - this seems excessive")
-            print(f"[+] Completed scroll with {scroll_count} total scrolls")
-            break
     
-    print(f"[+] Completed single-pass scroll with {scroll_count} total scrolls")
+    # The network responses already hold every row in graphql mode, only rendered lists can have gaps
+    if LIST_INGESTION_MODE != 'graphql':
+        gap_start_count = len(users_data)
+        gap_scrolls = fill_coverage_gaps(driver, users_data, coverage, state['viewport'] or 600, snapshot_parser)
+        scroll_count += gap_scrolls
+        if gap_scrolls:
+            print(f"[+] Revisited {gap_scrolls} unread stretches, {len(users_data) - gap_start_count} more users")
+    
+    print(f"[+] Completed viewport-stepped scroll with {scroll_count} total scrolls")
+    if snapshot_parser:
+        snapshot_parser.close()
+    # Rows recovered from gaps were appended late - put everyone back in list order
+    if users_data.sort_by_offset():
+        print("[!] Reordered users by their row position in the list")
+    if anchor and anchor.matched_index is not None:
+        fresh_count = len(users_data)
+        print(f"[+] Reused {anchor.merge_tail(users_data)} users from the previous run below the {fresh_count} collected")
+    report_round_trips(driver, start_commands, users_data, start_bytes, scroll_count)
     return users_data
 
+def report_round_trips(driver, start_commands, users_data, start_bytes=0, scrolls=0):
+    """Print how many WebDriver round trips and response bytes a collection pass cost"""
+    round_trips = get_command_count(driver) - start_commands
+    if round_trips <= 0:
+        return
+    per_user = round_trips / len(users_data) if users_data else float(round_trips)
+    print(f"[!] WebDriver round trips: {round_trips} ({per_user:.2f} per collected user, mode: {CELL_EXTRACTION_MODE})")
+    received = get_bytes_received(driver) - start_bytes
+    per_scroll = f", {received / scrolls / 1024:.1f} KB per scroll" if scrolls else ""
+    print(f"[!] WebDriver responses: {received / 1024:.1f} KB{per_scroll}")
+
+def add_read_spans(coverage, spans):
+    if coverage is not None:
+        for span in spans or []:
+            coverage.add(span)
+
+def collect_visible_users(driver, users_data, snapshot_parser=None, coverage=None, mounted_span=None):
+    """Collect users from UserCells not processed on a previous pass, returns the number of new cells
+    (None if the in-page extraction failed and nothing was read). The spans of cells actually read are added
+    to coverage; in graphql mode rows come from the responses, so the whole mounted_span counts as read"""
+    if LIST_INGESTION_MODE == 'graphql':
+        entry_count = collect_users_from_graphql(driver, users_data)
+        if entry_count is not None:
+            add_read_spans(coverage, [mounted_span] if mounted_span else [])
+            return entry_count
+        print("[!] GraphQL capture hook not installed on this page - falling back to DOM extraction")
+    
+    if CELL_EXTRACTION_MODE == 'script':
+        return collect_users_from_script(driver, users_data, coverage)
+    if snapshot_parser:
+        return collect_users_from_snapshot(driver, snapshot_parser, coverage)
+    
+    user_cells = driver.find_elements(By.CSS_SELECTOR, f'[data-testid="UserCell"]:not([{PROCESSED_CELL_ATTR}])')
+    if user_cells:
+        collect_users_from_cells(user_cells, users_data)
+        try:
+            # Mark the whole batch in one round trip, which also reports the spans read
+            add_read_spans(coverage, driver.execute_script(
+                READ_SPANS_FUNCTION_JS +
+                "for (const cell of arguments[0]) if (cell.querySelector('a[href^=\"/\"]')) cell.setAttribute(arguments[1], '1');"
+                "return readSpans(arguments[1]);",
+                user_cells, PROCESSED_CELL_ATTR
+            ))
+        except Exception as e:
+            print(f"[!] Error marking processed cells: {e}")
+    return len(user_cells)
+
 def is_valid_user_link(href):
     """Check if a href is a valid user profile link"""
     invalid_patterns = ['/status/', '/photo/', '/search', '/hashtag/', '/i/', '/intent/', '/compose/']
@@ -311,7 +1283,7 @@ def is_valid_username(username):
             not username.isdigit())
 
 def extract_follow_date(cell, position):
-    """Extract follow date from cell element"""
+    """Extract follow date from cell element, None if it has none (the record falls back to its position)"""
     try:
         # Look for time elements or date indicators
         time_elements = cell.find_elements(By.CSS_SELECTOR, 'time')
@@ -319,8 +1291,7 @@ def extract_follow_date(cell, position):
             return time_elements[0].get_attribute('datetime')
     except:
         pass
-    # Fallback: use position
-    return f"position_{position}"
+    return None
 
 def collect_users_from_cells(user_cells, users_data):
     """Process user cells and extract user information"""
@@ -328,38 +1299,353 @@ def collect_users_from_cells(user_cells, users_data):
         try:
             # Check if this cell contains follow status indicators
             has_following = len(cell.find_elements(By.XPATH, ".//*[contains(text(), 'Following') or contains(text(), 'Follows you')]")) > 0
+            # "Following" is on every cell of your own following list, so track "Follows you" separately
+            follows_you = has_following and len(cell.find_elements(By.XPATH, ".//*[contains(text(), 'Follows you')]")) > 0
             
             # Find username link - try multiple approaches
             username_links = cell.find_elements(By.CSS_SELECTOR, 'a[href^="/"]')
             for username_link in username_links:
                 href = username_link.get_attribute('href')
+                if href in users_data.seen_hrefs:
+                    break  # This cell's user was already collected
                 
                 if href and is_valid_user_link(href):
                     username = extract_username_from_url(href)
                     
                     if username and is_valid_username(username):
                         # Check if we already have this user
-                        if not any(user['username'] == username for user in users_data):
+                        if not users_data.has_user(username):
                             # Try to find follow date or any timestamp info
                             follow_date = extract_follow_date(cell, len(users_data))
                             
                             # Try to extract profile picture URL from the cell (non-verbose for speed)
                             profile_pic_url = extract_profile_pic_from_cell(cell, verbose=False)
                             
-                            users_data.append({
-                                'username': username,
-                                'follow_date': follow_date,
-                                'position': len(users_data),
-                                'has_status_indicator': has_following,
-                                'profile_pic_url': profile_pic_url
-                            })
+                            users_data.append(UserRecord(username, len(users_data), follow_date, has_following,
+                                                         follows_you, profile_pic_url), href)
                             pic_status = "[+]" if profile_pic_url else "[-]"
-                            print(f"[+] Added user: {username} (position {len(users_data)}) - Status: {'+' if has_following else '?'} - Pic: {pic_status}")
+                            print(f"[+] Added user: {username} (position {len(users_data)}) - Status: {'+' if has_following else '?'} - Follows you: {'+' if follows_you else '?'} - Pic: {pic_status}")
                             break  # Found a valid user in this cell, move to next cell
         except Exception as e:
             print(f"[!] Error processing cell: {e}")
             continue
 
+def collect_users_from_script(driver, users_data, coverage=None):
+    """Extract all unprocessed UserCells with a single execute_script call and add new users"""
+    try:
+        extracted = driver.execute_script(EXTRACT_USER_CELLS_JS, CELL_IMG_SELECTORS, PROCESSED_CELL_ATTR) or {}
+    except Exception as e:
+        print(f"[!] Error extracting cells via script: {e}")
+        return None
+    
+    cells = extracted.get('cells') or []
+    add_users_from_cells(cells, users_data)
+    add_read_spans(coverage, extracted.get('spans'))
+    return len(cells)
+
+def add_users_from_cells(cells, users_data):
+    """Add new users from extracted cell dicts (hrefs, time, avatar, has_status, follows_you, top)"""
+    for cell in cells:
+        for href in cell.get('hrefs') or []:
+            if href in users_data.seen_hrefs:
+                break  # This cell's user was already collected
+            
+            if href and is_valid_user_link(href):
+                username = extract_username_from_url(href)
+                
+                if username and is_valid_username(username):
+                    if not users_data.has_user(username):
+                        avatar = cell.get('avatar')
+                        profile_pic_url = normalize_profile_pic_url(avatar) if avatar else None
+                        has_following = bool(cell.get('has_status'))
+                        follows_you = bool(cell.get('follows_you'))
+                        
+                        users_data.append(UserRecord(username, len(users_data), cell.get('time'), has_following,
+                                                     follows_you, profile_pic_url), href)
+                        if cell.get('top') is not None:
+                            users_data.offsets[username] = cell['top']
+                        pic_status = "[+]" if profile_pic_url else "[-]"
+                        print(f"[+] Added user: {username} (position {len(users_data)}) - Status: {'+' if has_following else '?'} - Follows you: {'+' if follows_you else '?'} - Pic: {pic_status}")
+                    break  # Found a valid user in this cell, move to next cell
+
+def collect_users_from_snapshot(driver, snapshot_parser, coverage=None):
+    """Serialize the new UserCells in one call and hand them to the parser thread, returns the number of new cells"""
+    try:
+        snapshot = driver.execute_script(SNAPSHOT_CELLS_JS, PROCESSED_CELL_ATTR, CELL_OFFSET_ATTR)
+    except Exception as e:
+        print(f"[!] Error snapshotting cells: {e}")
+        return None
+    if snapshot and snapshot['count']:
+        snapshot_parser.submit(snapshot['html'])
+    if snapshot:
+        add_read_spans(coverage, snapshot.get('spans'))
+    return snapshot['count'] if snapshot else 0
+
+def parse_user_cells_html(html, base_url=None):
+    """Parse serialized UserCells into the same cell dicts EXTRACT_USER_CELLS_JS returns"""
+    base_url = base_url or X_BASE_URL
+    soup = BeautifulSoup(html, SNAPSHOT_PARSER)
+    cells = []
+    for cell in soup.select('[data-testid="UserCell"]'):
+        avatar = None
+        for selector in CELL_IMG_SELECTORS:
+            for img in cell.select(selector):
+                src = img.get('src') or ''
+                if src.startswith(('http://', 'https://')) and 'pbs.twimg.com' in src and 'profile_images' in src:
+                    avatar = src
+                    break
+            if avatar:
+                break
+        time_element = cell.find('time')
+        texts = cell.find_all(string=True)
+        top = cell.get(CELL_OFFSET_ATTR)
+        cells.append({
+            'hrefs': [urljoin(base_url, link['href']) for link in cell.select('a[href^="/"]')],
+            'time': time_element.get('datetime') if time_element else None,
+            'avatar': avatar,
+            'has_status': any('Following' in text or 'Follows you' in text for text in texts),
+            'follows_you': any('Follows you' in text for text in texts),
+            'top': float(top) if top else None
+        })
+    return cells
+
+def parse_profile_html(html):
+    """Read the "Follows you" badge and avatar URL from a recorded profile page"""
+    soup = BeautifulSoup(html, SNAPSHOT_PARSER)
+    header = soup.select_one('[data-testid="UserName"]') or soup
+    follows_you = (soup.select_one('[data-testid="userFollowIndicator"]') is not None or
+                   any('follows you' in text.lower() for text in header.find_all(string=True)))
+    avatar = None
+    for img in soup.select('img[src*="profile_images"]'):
+        avatar = img.get('src')
+        break
+    return {'follows_you': follows_you, 'avatar': avatar}
+
+class SnapshotParser:
+    """Parses UserCell snapshots on a background thread, adding users to users_data in the order they were taken"""
+    
+    def __init__(self, users_data, page_type, record_dir=SNAPSHOT_DIR):
+        self.users_data = users_data
+        self.page_type = page_type
+        self.record_dir = record_dir
+        if record_dir:
+            os.makedirs(record_dir, exist_ok=True)
+            # A shorter run would leave higher-numbered snapshots of an earlier one for --offline to mix in
+            for stale_path in glob.glob(os.path.join(record_dir, f'{page_type}_*.html')):
+                os.remove(stale_path)
+        self.snapshots = 0
+        self.cells = 0
+        self.parse_time = 0.0
+        self.jobs = queue.Queue()
+        self.thread = threading.Thread(target=self._worker, daemon=True)
+        self.thread.start()
+    
+    def submit(self, html):
+        self.snapshots += 1
+        self.jobs.put((self.snapshots, html))
+    
+    def _worker(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            index, html = job
+            if self.record_dir:
+                with open(os.path.join(self.record_dir, f'{self.page_type}_{index:04d}.html'), 'w', encoding='utf-8') as f:
+                    f.write(html)
+            start = time.perf_counter()
+            try:
+                cells = parse_user_cells_html(html)
+                add_users_from_cells(cells, self.users_data)
+                self.cells += len(cells)
+            except Exception as e:
+                print(f"[!] Error parsing snapshot {index}: {e}")
+            self.parse_time += time.perf_counter() - start
+    
+    def close(self):
+        """Wait for the queued snapshots to be parsed, then stop the thread"""
+        self.jobs.put(None)
+        self.thread.join()
+        print(f"[!] Parsed {self.cells} cells from {self.snapshots} snapshots in {self.parse_time:.2f}s "
+              f"off the browser thread ({SNAPSHOT_PARSER})")
+
+def record_profile_snapshot(driver, username):
+    """Save the current profile page's main column to SNAPSHOT_DIR/profiles for offline re-parsing"""
+    try:
+        html = driver.execute_script(
+            "const column = document.querySelector('[data-testid=\"primaryColumn\"]'); "
+            "return column ? column.outerHTML : document.body.outerHTML;")
+        profile_dir = os.path.join(SNAPSHOT_DIR, 'profiles')
+        os.makedirs(profile_dir, exist_ok=True)
+        with open(os.path.join(profile_dir, f'{username}.html'), 'w', encoding='utf-8') as f:
+            f.write(html)
+    except (OSError, WebDriverException) as e:
+        print(f"     [!] Could not record profile snapshot for @{username}: {e}")
+
+def run_offline(snapshot_dir):
+    """Rebuild the results JSON from a recorded SNAPSHOT_DIR without starting a browser"""
+    start = time.perf_counter()
+    following = CollectedUsers()
+    cell_count = 0
+    for path in sorted(glob.glob(os.path.join(snapshot_dir, 'following_*.html'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            cells = parse_user_cells_html(f.read())
+        cell_count += len(cells)
+        add_users_from_cells(cells, following)
+    # Rows recovered from gaps were snapshotted late - put them back in list order, as a live run does
+    following.sort_by_offset()
+    
+    follower_usernames = None
+    follower_paths = sorted(glob.glob(os.path.join(snapshot_dir, 'followers_*.html')))
+    if follower_paths:
+        followers = CollectedUsers()
+        for path in follower_paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                cells = parse_user_cells_html(f.read())
+            cell_count += len(cells)
+            add_users_from_cells(cells, followers)
+        follower_usernames = {user.username.lower() for user in followers}
+    
+    profiles = {}
+    for path in glob.glob(os.path.join(snapshot_dir, 'profiles', '*.html')):
+        with open(path, 'r', encoding='utf-8') as f:
+            profiles[os.path.splitext(os.path.basename(path))[0].lower()] = parse_profile_html(f.read())
+    elapsed = time.perf_counter() - start
+    
+    if not following:
+        print(f"[-] No following_*.html snapshots in {snapshot_dir} - record some with CELL_EXTRACTION_MODE = 'snapshot' and SNAPSHOT_DIR set")
+        return
+    
+    mutual_following_data = []
+    for user_data in following:
+        profile = profiles.get(user_data.username.lower())
+        # Same precedence as a live run: list intersection, then the profile page, then the cell badge
+        if follower_usernames is not None:
+            follows_you_back = user_data.username.lower() in follower_usernames
+        elif profile:
+            follows_you_back = profile['follows_you']
+        else:
+            follows_you_back = user_data.follows_you
+        if follows_you_back:
+            if not user_data.profile_pic_url and profile and profile['avatar']:
+                user_data.profile_pic_url = intern_optional(normalize_profile_pic_url(profile['avatar']))
+            mutual_following_data.append(user_data)
+    
+    mutual_following_data.sort(key=lambda x: x.position, reverse=True)
+    for number, user_data in enumerate(mutual_following_data, 1):
+        user_data.number = number
+    
+    json_data = {
+        'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'target_username': USERNAME or None,
+        'list_type': "mutual following (people who follow you back)",
+        'source': f'offline re-parse of {snapshot_dir}',
+        'total_results': len(mutual_following_data),
+        'total_following': len(following),
+        'total_followers': len(follower_usernames) if follower_usernames is not None else 0,
+        'successful_downloads': 0,
+        'results': mutual_following_data
+    }
+    with open(JSON_OUTPUT_FILE, 'w', encoding='utf-8') as f:
+        json.dump(json_data, f, indent=2, ensure_ascii=False, default=UserRecord.to_result)
+    
+    print(f"\n[+] Parsed {cell_count} cells and {len(profiles)} profiles in {elapsed:.2f}s "
+          f"({cell_count / max(elapsed, 1e-6):.0f} cells/s, {SNAPSHOT_PARSER})")
+    print(f"[+] {len(mutual_following_data)} mutuals out of {len(following)} followed accounts written to {JSON_OUTPUT_FILE}")
+
+def collect_users_from_graphql(driver, users_data):
+    """Drain captured list responses and add their users, returns the number of user entries (None if no hook)"""
+    try:
+        captured = driver.execute_script("return window.__xmfsCapture ? window.__xmfsCapture.splice(0) : null;")
+    except Exception as e:
+        print(f"[!] Error draining captured GraphQL responses: {e}")
+        return 0
+    if captured is None:
+        return None
+    
+    entry_count = 0
+    for response in captured:
+        record_graphql_response(response)
+        try:
+            payload = json.loads(response.get('body') or '')
+        except ValueError:
+            print(f"[!] Skipping unparseable GraphQL response from {response.get('url')}")
+            continue
+        
+        users, _ = parse_graphql_list_response(payload)
+        entry_count += len(users)
+        for user in users:
+            username = user['username']
+            # screen_name is the exact handle - is_valid_username's href heuristics (e.g. no leading "i") don't apply
+            if not username or users_data.has_user(username):
+                continue
+            
+            avatar = user['profile_pic_url']
+            profile_pic_url = normalize_profile_pic_url(avatar) if is_valid_twitter_profile_url(avatar, verbose=False) else None
+            users_data.append(UserRecord(username, len(users_data), None, True, user['follows_you'], profile_pic_url))
+            pic_status = "[+]" if profile_pic_url else "[-]"
+            print(f"[+] Added user (graphql): {username} (position {len(users_data)}) - Follows you: {'+' if user['follows_you'] else '?'} - Pic: {pic_status}")
+    return entry_count
+
+def iter_graphql_timeline_entries(node):
+    """Yield every timeline entry found under any 'instructions' list in a GraphQL payload"""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == 'instructions' and isinstance(value, list):
+                for instruction in value:
+                    if not isinstance(instruction, dict):
+                        continue
+                    yield from instruction.get('entries') or []
+                    if isinstance(instruction.get('entry'), dict):
+                        yield instruction['entry']
+            else:
+                yield from iter_graphql_timeline_entries(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from iter_graphql_timeline_entries(item)
+
+def parse_graphql_list_response(payload):
+    """Parse a Following/Followers GraphQL response into (users, bottom_cursor)"""
+    users = []
+    bottom_cursor = None
+    for entry in iter_graphql_timeline_entries(payload):
+        content = entry.get('content') or {}
+        if content.get('cursorType') == 'Bottom':
+            bottom_cursor = content.get('value')
+            continue
+        
+        result = ((content.get('itemContent') or {}).get('user_results') or {}).get('result') or {}
+        if result.get('__typename') == 'UserWithVisibilityResults':
+            result = result.get('user') or {}
+        legacy = result.get('legacy') or {}
+        core = result.get('core') or {}
+        username = legacy.get('screen_name') or core.get('screen_name')
+        if not username:
+            continue  # Cursor-less module, suspended or unavailable account
+        
+        # Newer responses moved these fields out of 'legacy'
+        relationship = result.get('relationship_perspectives') or {}
+        users.append({
+            'username': username,
+            'profile_pic_url': legacy.get('profile_image_url_https') or (result.get('avatar') or {}).get('image_url'),
+            'follows_you': bool(legacy.get('followed_by') or relationship.get('followed_by'))
+        })
+    return users, bottom_cursor
+
+def record_graphql_response(response):
+    """Save a captured list response to GRAPHQL_RECORD_DIR as a replayable fixture"""
+    if not GRAPHQL_RECORD_DIR:
+        return
+    match = re.search(GRAPHQL_LIST_URL_PATTERN, response.get('url') or '')
+    operation = match.group(1).lower() if match else 'unknown'
+    try:
+        os.makedirs(GRAPHQL_RECORD_DIR, exist_ok=True)
+        page = sum(1 for name in os.listdir(GRAPHQL_RECORD_DIR) if name.startswith(f'{operation}_'))
+        with open(os.path.join(GRAPHQL_RECORD_DIR, f'{operation}_{page:04d}.json'), 'w', encoding='utf-8') as f:
+            f.write(response.get('body') or '')
+    except OSError as e:
+        print(f"[!] Failed to record GraphQL response: {e}")
+
 def try_alternative_selectors(driver, users_data):
     """Try alternative selectors to find users"""
     selectors = [
@@ -377,10 +1663,12 @@ def try_alternative_selectors(driver, users_data):
         for link in user_links:
             try:
                 href = link.get_attribute('href')
+                if href in users_data.seen_hrefs:
+                    continue
                 if href and is_valid_user_link(href):
                     username = extract_username_from_url(href)
                     if username and is_valid_username(username):
-                        if not any(user['username'] == username for user in users_data):
+                        if not users_data.has_user(username):
                             # Try to find the parent cell for profile pic extraction
                             try:
                                 parent_cell = link.find_element(By.XPATH, "./ancestor::*[@data-testid='UserCell']")
@@ -388,13 +1676,7 @@ def try_alternative_selectors(driver, users_data):
                             except:
                                 profile_pic_url = None
                                 
-                            users_data.append({
-                                'username': username,
-                                'follow_date': f"position_{len(users_data)}",
-                                'position': len(users_data),
-                                'has_status_indicator': False,
-                                'profile_pic_url': profile_pic_url
-                            })
+                            users_data.append(UserRecord(username, len(users_data), profile_pic_url=profile_pic_url), href)
                             pic_status = "[+]" if profile_pic_url else "[-]"
                             print(f"[+] Added user (fallback): {username} - Pic: {pic_status}")
             except Exception:
@@ -428,23 +1710,23 @@ def is_valid_twitter_profile_url(url, verbose=True):
     
     return True
 
+def normalize_profile_pic_url(src):
+    """Convert a profile image URL to its highest quality version (original size)"""
+    pic_url = re.sub(r'_\d+x\d+', '_400x400', src)  # Start with 400x400
+    pic_url = re.sub(r'_normal', '_400x400', pic_url)  # Replace _normal with _400x400
+    pic_url = re.sub(r'_bigger', '_400x400', pic_url)  # Replace _bigger with _400x400
+    pic_url = re.sub(r'_mini', '_400x400', pic_url)   # Replace _mini with _400x400
+    
+    # Try to get even higher quality by removing size restrictions entirely
+    return re.sub(r'_400x400', '', pic_url)
+
 def extract_profile_pic_from_cell(cell, verbose=True):
     """Extract profile picture URL from a UserCell element - Firefox compatible with optional debugging"""
     try:
         if verbose:
             print(f"     [!] Searching for profile pic in UserCell...")
         # Look for profile images in the cell with Firefox-compatible selectors
-        img_selectors = [
-            'img[src*="profile_images"]',
-            'img[src*="pbs.twimg.com"]',
-            '[data-testid*="Avatar"] img',
-            '[data-testid="UserAvatar-Container"] img',
-            'img[alt*="profile"]',
-            'div img[src*="twimg"]',
-            'img'
-        ]
-        
-        for selector_idx, selector in enumerate(img_selectors, 1):
+        for selector_idx, selector in enumerate(CELL_IMG_SELECTORS, 1):
             try:
                 if verbose:
                     print(f"     [!] Trying selector {selector_idx}: {selector}")
@@ -459,14 +1741,7 @@ def extract_profile_pic_from_cell(cell, verbose=True):
                             print(f"     [!] Image {img_idx} src: {src}")
                         
                         if src and is_valid_twitter_profile_url(src, verbose=verbose):
-                            # Convert to highest quality version (original size)
-                            pic_url = re.sub(r'_\d+x\d+', '_400x400', src)  # Start with 400x400
-                            pic_url = re.sub(r'_normal', '_400x400', pic_url)  # Replace _normal with _400x400
-                            pic_url = re.sub(r'_bigger', '_400x400', pic_url)  # Replace _bigger with _400x400
-                            pic_url = re.sub(r'_mini', '_400x400', pic_url)   # Replace _mini with _400x400
-                            
-                            # Try to get even higher quality by removing size restrictions entirely
-                            high_quality_url = re.sub(r'_400x400', '', pic_url)
+                            high_quality_url = normalize_profile_pic_url(src)
                             
                             if verbose:
                                 print(f"     [+] Found valid profile pic: {high_quality_url}")
@@ -487,11 +1762,14 @@ def extract_profile_pic_from_cell(cell, verbose=True):
             print(f"     [!?] Error in extract_profile_pic_from_cell: {e}")
     return None
 
-def get_following(driver, username):
-    """Get all following for a given username"""
-    url = f'https://x.com/{username}/following'
-    print(f"[!] Navigating to following page: {url}")
-    driver.get(url)
+def get_user_list(driver, username, list_type="following"):
+    """Get all users on a given username's following or followers list"""
+    url = f'{X_BASE_URL}/{username}/{list_type}'
+    print(f"[!] Navigating to {list_type} page: {url}")
+    if LIST_INGESTION_MODE == 'graphql':
+        navigate_with_graphql_capture(driver, url)
+    else:
+        navigate(driver, url)
     
     # Wait for page to load and check if login is required
     try:
@@ -509,20 +1787,21 @@ def get_following(driver, username):
             return []
             
     except TimeoutException:
-        print("[!?] Timeout waiting for following page to load")
+        print(f"[!?] Timeout waiting for {list_type} page to load")
         return []
     
-    time.sleep(5)  # Additional wait for dynamic content
+    try:
+        # Wait for the first rows instead of a fixed pause (empty or protected lists just time out)
+        WebDriverWait(driver, 5).until(EC.presence_of_element_located((By.CSS_SELECTOR, '[data-testid="UserCell"]')))
+    except TimeoutException:
+        pass
     
     print(f"[!] Checking page content for user: {username}")
     
-    # Check if the following list is completely inaccessible (but allow private accounts in list)
-    page_content = driver.page_source.lower()
-    
     # Debug: Print current URL and check for common error indicators
     print(f"[!] Current URL: {driver.current_url}")
     
-    # Only check for complete privacy restrictions, not individual private followers
+    # Only check for complete privacy restrictions, not individual private accounts
     complete_privacy_indicators = [
         "isn't available",
         "these tweets are protected",
@@ -531,32 +1810,74 @@ def get_following(driver, username):
         "not authorized to see"
     ]
     
-    for indicator in complete_privacy_indicators:
-        if indicator in page_content:
-            print(f"[!] Detected complete privacy restriction: '{indicator}' found in page")
-            print(f"[!] {username}'s following list is completely private or protected.")
-            return []
+    # Check if the list is completely inaccessible (but allow private accounts in list)
+    indicator = find_page_text(driver, complete_privacy_indicators)
+    if indicator:
+        print(f"[!] Detected complete privacy restriction: '{indicator}' found in page")
+        print(f"[!] {username}'s {list_type} list is completely private or protected.")
+        return []
     
-    # Check if we're actually on the following page
-    if f"/{username}/following" not in driver.current_url:
-        print(f"[!] Not on following page. Current URL: {driver.current_url}")
+    # Check if we're actually on the requested list page
+    if f"/{username}/{list_type}" not in driver.current_url:
+        print(f"[!] Not on {list_type} page. Current URL: {driver.current_url}")
         print(f"[!] May have been redirected due to privacy settings or login issues.")
         return []
     
-    # Check for empty following list (but account is public)
-    if "doesn't follow anyone yet" in page_content or "not following anyone" in page_content:
-        print(f"[!] {username} doesn't appear to follow anyone yet.")
+    # Check for empty list (but account is public)
+    empty_indicators = {
+        "following": ["doesn't follow anyone yet", "not following anyone"],
+        "followers": ["doesn't have any followers", "no followers yet"]
+    }
+    if find_page_text(driver, empty_indicators.get(list_type, [])):
+        print(f"[!] {username}'s {list_type} list appears to be empty.")
         return []
     
-    print(f"[+] Page appears accessible, proceeding to collect following...")
+    print(f"[+] Page appears accessible, proceeding to collect {list_type}...")
     print(f"[!] Note: Private accounts (with lock icons) will be included - privacy status doesn't affect mutual following")
-    return scroll_and_collect_users_with_dates(driver, "following")
+    previous_users = load_cached_list(username, list_type) if INCREMENTAL_SCROLL else None
+    if previous_users:
+        print(f"[!] Incremental mode: scrolling until the list joins the {len(previous_users)} users cached from the last run")
+    users_data = scroll_and_collect_users_with_dates(driver, list_type, previous_users)
+    if users_data.complete:
+        save_cached_list(username, list_type, users_data)
+    return users_data
+
+def navigate_with_graphql_capture(driver, url):
+    """Open a list page via client-side routing so the capture hook sees its first responses"""
+    # A full page load would discard the hook, so load the app once and route inside it
+    if not driver.current_url.startswith(X_BASE_URL):
+        navigate(driver, f'{X_BASE_URL}/home')
+    
+    driver.execute_script(GRAPHQL_CAPTURE_HOOK_JS, GRAPHQL_LIST_URL_PATTERN)
+    path = url[len(X_BASE_URL):] if url.startswith(X_BASE_URL) else url
+    driver.execute_script(
+        "window.__xmfsCapture.length = 0;"
+        "history.pushState({}, '', arguments[0]);"
+        "window.dispatchEvent(new PopStateEvent('popstate', {state: {}}));",
+        path
+    )
+    print(f"[+] GraphQL capture hook installed, routed to {path}")
+
+def get_following(driver, username):
+    """Get all following for a given username"""
+    return get_user_list(driver, username, "following")
+
+def get_followers(driver, username):
+    """Get all followers for a given username"""
+    return get_user_list(driver, username, "followers")
+
+PROFILE_IMAGE_MARKUP_PROBE_JS = """
+const match = document.documentElement.innerHTML.match(/https:\\/\\/pbs\\.twimg\\.com\\/profile_images\\/[^"]*/);
+return match ? match[0] : null;
+"""
 
 def get_profile_pic(driver, username):
     """Get profile picture URL for a user - Firefox compatible with high quality"""
-    url = f'https://x.com/{username}'
+    url = f'{X_BASE_URL}/{username}'
     print(f'     [!] Fetching high-quality profile pic from {url}')
-    driver.get(url)
+    if not navigate(driver, url):
+        print(f"     [-] Profile of @{username} is rate limited - no picture this run")
+        return None
     
     try:
         # Wait for profile image to load - Firefox-compatible selectors
@@ -596,13 +1917,10 @@ def get_profile_pic(driver, username):
                 print(f'     🎯 High-quality URL: {high_quality_url}')
                 return high_quality_url
         else:
-            # Fallback: try to find any profile image in the page source
-            print(f'     [!] Trying page source fallback...')
-            page_source = driver.page_source
-            profile_img_pattern = r'https://pbs\.twimg\.com/profile_images/[^"]*'
-            matches = re.findall(profile_img_pattern, page_source)
-            if matches:
-                pic_url = matches[0]
+            # Fallback: try to find any profile image URL in the markup (searched in-page, only the match comes back)
+            print(f'     [!] Trying page markup fallback...')
+            pic_url = driver.execute_script(PROFILE_IMAGE_MARKUP_PROBE_JS)
+            if pic_url:
                 # Remove size restrictions for highest quality
                 high_quality_url = re.sub(r'_\d+x\d+', '', pic_url)
                 high_quality_url = re.sub(r'_normal', '', high_quality_url)
@@ -617,22 +1935,203 @@ def get_profile_pic(driver, username):
     
     return None
 
-def download_image(url, filepath, username):
+def check_follows_back(driver, username):
+    """Visit a user's profile and check whether they follow you back"""
+    profile_url = f'{X_BASE_URL}/{username}'
+    print(f"     [!] Navigating to {profile_url}")
+    # The rate limiter spaces out visits; waiting for the profile header replaces the old fixed sleeps
+    if not navigate(driver, profile_url, ready_selector='[data-testid="UserName"]'):
+        # A throttled page has no badge either - raise so the user is retried later instead of stored as not mutual
+        raise RuntimeError(f"profile of @{username} was still rate limited after retries")
+    
+    print(f"     [!] Checking if @{username} follows you back...")
+    
+    follows_you_indicators = [
+        'follows you',
+        'follow you',
+        'following you',
+        'follows @' + USERNAME.lower(),
+        'follow @' + USERNAME.lower(),
+        'following @' + USERNAME.lower()
+    ]
+    
+    if SNAPSHOT_DIR:
+        record_profile_snapshot(driver, username)
+    
+    # One in-page probe: the badge element, else the indicator text in the profile header
+    indicator = find_page_text(driver, follows_you_indicators,
+                               scopes=('[data-testid="UserName"]', '[data-testid="primaryColumn"]'),
+                               marker='[data-testid="userFollowIndicator"]')
+    if indicator:
+        print(f"     [+] Follow back detected via '{indicator}'")
+        return True
+    
+    return False
+
+def check_profile(driver, username, follows_back=None, fetch_pic=False):
+    """Visit a profile as needed, returns (follows_back, pic_url) - pic_url is only looked up for mutuals when fetch_pic is set"""
+    if follows_back is None:
+        follows_back = check_follows_back(driver, username)
+    pic_url = get_profile_pic(driver, username) if follows_back and fetch_pic else None
+    return follows_back, pic_url
+
+def copy_session_cookies(source_driver, target_driver):
+    """Log target_driver in by copying the authenticated cookies from source_driver, returns True if it worked"""
+    # Cookies can only be added for the site that is currently loaded
+    target_driver.get(f'{X_BASE_URL}/favicon.ico')
+    add_cookies(target_driver, source_driver.get_cookies())
+    
+    navigate(target_driver, f'{X_BASE_URL}/home', attempts=1)
+    if 'login' in target_driver.current_url.lower():
+        print("[!?] Copied cookies didn't carry the login over to the new browser")
+        return False
+    return True
+
+def create_http_session(pool_size=AVATAR_DOWNLOAD_WORKERS):
+    """Create a keep-alive requests session whose connection pool fits pool_size concurrent downloads"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(pool_size, 1))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update(IMAGE_REQUEST_HEADERS)
+    return session
+
+class AvatarCache:
+    """Content-addressed avatar store keyed by profile image URL, revalidated with ETag/Last-Modified"""
+    
+    def __init__(self, cache_dir=AVATAR_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, 'objects')
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.index = self._load_index()
+        self.not_modified = 0
+        self.stored = 0
+        self.deduplicated = 0
+        self.bytes_saved = 0
+        self.corrupted = 0
+        self.verified = set()  # Digests whose object was re-hashed this run
+    
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    @staticmethod
+    def canonical_url(url):
+        """Cache key for an image URL - query strings don't change the image"""
+        return url.split('?', 1)[0]
+    
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, f'{digest}.img')
+    
+    def _intact(self, digest):
+        """Whether the object for digest exists and still hashes to it, checked once per run.
+        Output files from older versions were hard links to the objects, so an edited picture changed them too"""
+        if digest in self.verified:
+            return True
+        path = self.object_path(digest)
+        try:
+            with open(path, 'rb') as f:
+                intact = hashlib.sha256(f.read()).hexdigest() == digest
+        except FileNotFoundError:
+            return False
+        if not intact:
+            print(f"[!?] Cached avatar {path} no longer matches its hash - downloading it again")
+            self.corrupted += 1
+            os.remove(path)
+            return False
+        self.verified.add(digest)
+        return True
+    
+    def lookup(self, url):
+        """Return the cached object path for url, or None if it isn't cached (or the object was damaged)"""
+        with self.lock:
+            entry = self.index.get(self.canonical_url(url))
+            if entry and self._intact(entry['sha256']):
+                return self.object_path(entry['sha256'])
+        return None
+    
+    def conditional_headers(self, url):
+        """Validators to send so an unchanged image comes back as 304 Not Modified"""
+        if not self.lookup(url):
+            return {}
+        with self.lock:
+            entry = self.index[self.canonical_url(url)]
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+    
+    def mark_not_modified(self, url):
+        """Record a 304 for url, returns the cached object path"""
+        path = self.lookup(url)
+        if path:
+            with self.lock:
+                self.not_modified += 1
+                self.bytes_saved += os.path.getsize(path)
+        return path
+    
+    def store(self, url, response):
+        """Store a 200 response body by content hash and remember its validators, returns the object path"""
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        path = self.object_path(digest)
+        
+        with self.lock:
+            if self._intact(digest):
+                self.deduplicated += 1  # Identical image already stored under another URL or run
+            else:
+                temp_path = f'{path}.{threading.get_ident()}.tmp'
+                with open(temp_path, 'wb') as f:
+                    f.write(content)
+                os.replace(temp_path, path)
+                self.stored += 1
+                self.verified.add(digest)
+            self.index[self.canonical_url(url)] = {
+                'sha256': digest,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'content_type': response.headers.get('content-type')
+            }
+        return path
+    
+    @staticmethod
+    def link(object_path, filepath):
+        """Expose a cached object at filepath as an independent copy, so editing or overwriting the output
+        can't change the content-addressed object behind it"""
+        if os.path.exists(filepath):
+            os.remove(filepath)  # May still be a hard link to the object from an older run - don't write through it
+        shutil.copyfile(object_path, filepath)
+    
+    def save(self):
+        """Write the URL index atomically"""
+        with self.lock:
+            temp_path = f'{self.index_path}.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f)
+            os.replace(temp_path, self.index_path)
+    
+    def report(self):
+        print(f'[!] Avatar cache: {self.not_modified} unchanged (304), {self.stored} new images, '
+              f'{self.deduplicated} duplicate downloads, {self.bytes_saved / 1024:.1f} KB not re-downloaded')
+        if self.corrupted:
+            print(f'[!?] Avatar cache: {self.corrupted} damaged objects dropped and downloaded again')
+
+def download_image(url, filepath, username, session=None, cache=None):
     """Download high-quality image from URL to filepath with retry logic and enhanced debugging"""
     try:
         print(f'     [!] Starting download for {username}')
         print(f'     📋 URL: {url}')
         print(f'     [!] Filepath: {filepath}')
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:120.0) Gecko/20100101 Firefox/120.0',
-            'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1'
-        }
+        http = session or requests
+        headers = IMAGE_REQUEST_HEADERS
         
         print(f'     📥 Downloading high-quality image from: {url}')
         
@@ -649,17 +2148,34 @@ def download_image(url, filepath, username):
         for attempt, download_url in enumerate(urls_to_try, 1):
             try:
                 print(f'     🎯 Attempt {attempt}: {download_url}')
-                response = requests.get(download_url, headers=headers, timeout=30)
+                request_headers = dict(headers, **cache.conditional_headers(download_url)) if cache else headers
+                image_limiter.acquire()
+                response = http.get(download_url, headers=request_headers, timeout=30,
+                                    hooks={'response': metrics.record_http_response})
                 print(f'     [!] Response status: {response.status_code}')
                 print(f'     📋 Content-Type: {response.headers.get("content-type", "unknown")}')
+                if response.status_code == 429:
+                    image_limiter.on_throttle(f'HTTP 429 from {download_url}')
+                elif response.status_code < 400:
+                    image_limiter.on_success()
+                
+                if response.status_code == 304 and cache:
+                    cached_path = cache.mark_not_modified(download_url)
+                    if cached_path:
+                        cache.link(cached_path, filepath)
+                        print(f'     [+] Image unchanged since last run (304), reused cached copy')
+                        return True
                 response.raise_for_status()
                 
                 # Check if we got a valid image
                 content_type = response.headers.get('content-type', '')
                 if content_type.startswith('image/'):
                     print(f'     💾 Writing {len(response.content)} bytes to {filepath}')
-                    with open(filepath, 'wb') as f:
-                        f.write(response.content)
+                    if cache:
+                        cache.link(cache.store(download_url, response), filepath)
+                    else:
+                        with open(filepath, 'wb') as f:
+                            f.write(response.content)
                     
                     # Verify file was created and has content
                     if os.path.exists(filepath):
@@ -687,22 +2203,638 @@ def download_image(url, filepath, username):
         print(f"     [!] Traceback: {traceback.format_exc()}")
         return False
 
-def main():
-    print("=== X/Twitter Mutual Following Scraper ===")
-    print("(Finds people you follow who also follow you back)")
-    print(f"Target username: {USERNAME}")
-    print(f"Download directory: {DOWNLOAD_DIR}")
-    print("=" * 50)
+class RelationshipStore:
+    """SQLite cache of follow-back status per (target, user), so repeat runs only re-check stale entries"""
     
-    driver = setup_driver()
+    def __init__(self, db_path=RELATIONSHIP_DB_FILE):
+        self.connection = sqlite3.connect(db_path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS relationships (
+                target TEXT NOT NULL,
+                username TEXT NOT NULL,
+                follows_back INTEGER NOT NULL,
+                checked_at REAL NOT NULL,
+                avatar_url TEXT,
+                PRIMARY KEY (target, username)
+            )
+        """)
+        self.connection.commit()
     
-    try:
-        # Step 1: Login to Twitter
-        if not login_to_twitter(driver):
-            print("[-] Login failed. Cannot proceed without authentication.")
+    def get_fresh(self, target, username, ttl_hours=RELATIONSHIP_TTL_HOURS):
+        """Return the cached row for (target, username) if it was checked within ttl_hours, else None"""
+        row = self.connection.execute(
+            "SELECT follows_back, checked_at, avatar_url FROM relationships WHERE target = ? AND username = ?",
+            (target.lower(), username.lower())
+        ).fetchone()
+        if row is None or time.time() - row['checked_at'] > ttl_hours * 3600:
+            return None
+        return {'follows_back': bool(row['follows_back']), 'checked_at': row['checked_at'], 'avatar_url': row['avatar_url']}
+    
+    def record(self, target, username, follows_back, avatar_url=None):
+        """Store a fresh follow-back result (keeping a previously known avatar URL if none is given)"""
+        self.connection.execute("""
+            INSERT INTO relationships (target, username, follows_back, checked_at, avatar_url)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (target, username) DO UPDATE SET
+                follows_back = excluded.follows_back,
+                checked_at = excluded.checked_at,
+                avatar_url = COALESCE(excluded.avatar_url, relationships.avatar_url)
+        """, (target.lower(), username.lower(), int(follows_back), time.time(), avatar_url))
+        self.connection.commit()
+    
+    def close(self):
+        self.connection.close()
+
+class FollowGraph:
+    """SQLite history of each run's edge sets, stored as intervals of consecutive runs an edge was seen in.
+    A run only writes the edges that appeared or disappeared, so recording and diffing don't slow down as runs pile up"""
+    
+    RELATIONS = ('following', 'followers', 'mutual')
+    
+    def __init__(self, db_path=FOLLOW_GRAPH_DB_FILE):
+        self.connection = sqlite3.connect(db_path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS accounts (
+                account_id INTEGER PRIMARY KEY,
+                username TEXT NOT NULL UNIQUE
+            );
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                source_id INTEGER NOT NULL,
+                relation TEXT NOT NULL,
+                recorded_at REAL NOT NULL,
+                edge_count INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS runs_by_source ON runs (source_id, relation, run_id);
+            -- One row per unbroken stretch of runs (of the same source and relation) the edge was present in,
+            -- last_run is NULL while the edge is still present in the latest run
+            CREATE TABLE IF NOT EXISTS edges (
+                source_id INTEGER NOT NULL,
+                relation TEXT NOT NULL,
+                target_id INTEGER NOT NULL,
+                first_run INTEGER NOT NULL,
+                last_run INTEGER,
+                PRIMARY KEY (source_id, relation, target_id, first_run)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS edges_by_last_run ON edges (source_id, relation, last_run);
+            CREATE INDEX IF NOT EXISTS edges_by_first_run ON edges (source_id, relation, first_run);
+        """)
+        self.connection.commit()
+    
+    def _account_ids(self, usernames):
+        """Load the lowercased usernames into the temp table current_set as account ids, creating missing accounts"""
+        self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS current_names (username TEXT PRIMARY KEY)")
+        self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS current_set (target_id INTEGER PRIMARY KEY)")
+        self.connection.execute("DELETE FROM current_names")
+        self.connection.execute("DELETE FROM current_set")
+        self.connection.executemany("INSERT OR IGNORE INTO current_names VALUES (?)",
+                                    ((username.lower(),) for username in usernames))
+        self.connection.execute("INSERT OR IGNORE INTO accounts (username) SELECT username FROM current_names")
+        self.connection.execute("""
+            INSERT INTO current_set SELECT accounts.account_id FROM current_names JOIN accounts USING (username)
+        """)
+    
+    def _source_id(self, username):
+        self.connection.execute("INSERT OR IGNORE INTO accounts (username) VALUES (?)", (username.lower(),))
+        return self.connection.execute("SELECT account_id FROM accounts WHERE username = ?", (username.lower(),)).fetchone()[0]
+    
+    def record_run(self, source, relation, usernames):
+        """Append one complete edge set as a new run, returns its run_id"""
+        with self.connection:
+            source_id = self._source_id(source)
+            previous = self.connection.execute(
+                "SELECT MAX(run_id) FROM runs WHERE source_id = ? AND relation = ?", (source_id, relation)
+            ).fetchone()[0]
+            self._account_ids(usernames)
+            edge_count = self.connection.execute("SELECT COUNT(*) FROM current_set").fetchone()[0]
+            run_id = self.connection.execute(
+                "INSERT INTO runs (source_id, relation, recorded_at, edge_count) VALUES (?, ?, ?, ?)",
+                (source_id, relation, time.time(), edge_count)
+            ).lastrowid
+            # Edges missing from this run close at the previous one, new edges open here; the rest stay untouched
+            self.connection.execute("""
+                UPDATE edges SET last_run = ?
+                WHERE source_id = ? AND relation = ? AND last_run IS NULL
+                  AND target_id NOT IN (SELECT target_id FROM current_set)
+            """, (previous, source_id, relation))
+            self.connection.execute("""
+                INSERT INTO edges (source_id, relation, target_id, first_run, last_run)
+                SELECT ?, ?, target_id, ?, NULL FROM current_set
+                WHERE target_id NOT IN (
+                    SELECT target_id FROM edges WHERE source_id = ? AND relation = ? AND last_run IS NULL
+                )
+            """, (source_id, relation, run_id, source_id, relation))
+        return run_id
+    
+    def runs(self, source, relation):
+        """All recorded runs of source's relation as (run_id, recorded_at, edge_count), oldest first"""
+        return [tuple(row) for row in self.connection.execute("""
+            SELECT run_id, recorded_at, edge_count FROM runs JOIN accounts ON accounts.account_id = runs.source_id
+            WHERE accounts.username = ? AND relation = ? ORDER BY run_id
+        """, (source.lower(), relation))]
+    
+    def diff(self, source, relation, from_run=None, to_run=None):
+        """Usernames gained and lost between two runs (default: the last two), as (gained, lost) sorted lists"""
+        run_ids = [run[0] for run in self.runs(source, relation)]
+        if from_run is None or to_run is None:
+            if len(run_ids) < 2:
+                return [], []
+            from_run, to_run = run_ids[-2], run_ids[-1]
+        params = {'source': source.lower(), 'relation': relation, 'from_run': from_run, 'to_run': to_run}
+        
+        def usernames(condition):
+            return [row[0] for row in self.connection.execute(f"""
+                SELECT username FROM accounts WHERE account_id IN (
+                    SELECT target_id FROM edges
+                    WHERE source_id = (SELECT account_id FROM accounts WHERE username = :source) AND relation = :relation
+                      AND {condition}
+                ) ORDER BY username
+            """, params)]
+        
+        if from_run in run_ids and to_run in run_ids and run_ids.index(to_run) == run_ids.index(from_run) + 1:
+            # Adjacent runs: changes are exactly the intervals opened at to_run and closed at from_run
+            return usernames("first_run = :to_run"), usernames("last_run = :from_run")
+        present_at = "first_run <= {0} AND (last_run IS NULL OR last_run >= {0})"
+        same_edges = ("SELECT target_id FROM edges WHERE source_id = (SELECT account_id FROM accounts WHERE username = :source) "
+                      "AND relation = :relation AND ")
+        gained = usernames(f"{present_at.format(':to_run')} AND target_id NOT IN ({same_edges}{present_at.format(':from_run')})")
+        lost = usernames(f"{present_at.format(':from_run')} AND target_id NOT IN ({same_edges}{present_at.format(':to_run')})")
+        return gained, lost
+    
+    def is_current(self, source, relation, username):
+        """Whether username was in the latest recorded run of source's relation"""
+        return self.connection.execute("""
+            SELECT 1 FROM edges
+            WHERE source_id = (SELECT account_id FROM accounts WHERE username = ?) AND relation = ?
+              AND target_id = (SELECT account_id FROM accounts WHERE username = ?) AND last_run IS NULL
+        """, (source.lower(), relation, username.lower())).fetchone() is not None
+    
+    def seen(self, source, relation, username):
+        """When username was first and last seen in source's relation, as (first_seen, last_seen) timestamps or None"""
+        row = self.connection.execute("""
+            SELECT MIN(first_runs.recorded_at), MAX(last_runs.recorded_at)
+            FROM edges
+            JOIN runs AS first_runs ON first_runs.run_id = edges.first_run
+            JOIN runs AS last_runs ON last_runs.run_id = COALESCE(edges.last_run, (
+                SELECT MAX(run_id) FROM runs WHERE runs.source_id = edges.source_id AND runs.relation = edges.relation
+            ))
+            WHERE edges.source_id = (SELECT account_id FROM accounts WHERE username = ?) AND edges.relation = ?
+              AND edges.target_id = (SELECT account_id FROM accounts WHERE username = ?)
+        """, (source.lower(), relation, username.lower())).fetchone()
+        return None if row[0] is None else (row[0], row[1])
+    
+    def close(self):
+        self.connection.close()
+
+class ImageDownloadPool:
+    """Bounded pool of threads downloading avatars over one shared keep-alive session"""
+    
+    def __init__(self, workers=AVATAR_DOWNLOAD_WORKERS, cache=None):
+        self.session = create_http_session(workers)
+        self.cache = cache
+        self.jobs = queue.Queue(maxsize=workers * 4)  # Bounded so the browser loop can't run far ahead
+        self.results = {}
+        self.latencies = []
+        self.bytes_downloaded = 0
+        self.first_submit = None
+        self.lock = threading.Lock()
+        self.threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(workers)]
+        for thread in self.threads:
+            thread.start()
+    
+    def submit(self, key, url, filepath, username):
+        """Queue a download; its outcome is stored in results[key] once finished"""
+        if self.first_submit is None:
+            self.first_submit = time.time()
+        self.jobs.put((key, url, filepath, username))
+    
+    def _worker(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            key, url, filepath, username = job
+            start = time.time()
+            try:
+                downloaded = download_image(url, filepath, username, session=self.session, cache=self.cache)
+            except Exception as e:
+                print(f"     [-] Download worker error for {username}: {e}")
+                downloaded = False
+            elapsed = time.time() - start
+            
+            with self.lock:
+                self.results[key] = downloaded
+                self.latencies.append(elapsed)
+                if downloaded:
+                    self.bytes_downloaded += os.path.getsize(filepath)
+    
+    def close(self):
+        """Wait for all queued downloads, stop the workers and report, returns the results dict"""
+        for _ in self.threads:
+            self.jobs.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.session.close()
+        self.report()
+        return self.results
+    
+    def pop_result(self, key):
+        """Return and forget the outcome of a finished download, None while it is still pending"""
+        with self.lock:
+            return self.results.pop(key, None)
+    
+    def report(self):
+        """Print per-download latency and overall throughput"""
+        if not self.latencies:
+            return
+        latencies = sorted(self.latencies)
+        wall_time = max(time.time() - self.first_submit, 1e-6)
+        successes = sum(1 for downloaded in self.results.values() if downloaded)
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f'[!] Avatar downloads: {successes}/{len(latencies)} succeeded with {len(self.threads)} workers')
+        print(f'[!] Latency per download: mean {sum(latencies) / len(latencies):.2f}s, p50 {p50:.2f}s, p95 {p95:.2f}s')
+        print(f'[!] Throughput: {len(latencies) / wall_time:.2f} downloads/s, {self.bytes_downloaded / 1024 / wall_time:.1f} KB/s')
+
+class ProfileCheckPool:
+    """Browsers sharing one login that visit profiles in parallel, results are handed back by submission index"""
+    
+    def __init__(self, driver, workers=PROFILE_CHECK_WORKERS):
+        self.jobs = queue.Queue()
+        self.results = {}
+        self.ready = threading.Condition()
+        self.stopping = False
+        self.drivers = [driver]  # The login browser is worker 0, extras are quit on close()
+        for number in range(2, workers + 1):
+            print(f"[!] Starting profile check browser {number}/{workers}...")
+            try:
+                extra_driver = setup_driver()
+            except Exception as e:
+                print(f"[!?] Could not start another browser ({e}) - continuing with {len(self.drivers)}")
+                break
+            if copy_session_cookies(driver, extra_driver):
+                self.drivers.append(extra_driver)
+            else:
+                extra_driver.quit()
+        self.alive = len(self.drivers)
+        self.checks = [0] * len(self.drivers)
+        self.start_bytes = [get_bytes_received(worker_driver) for worker_driver in self.drivers]
+        self.started = time.time()
+        self.threads = [threading.Thread(target=self._worker, args=(number,), daemon=True)
+                        for number in range(len(self.drivers))]
+        for thread in self.threads:
+            thread.start()
+        print(f"[+] Checking profiles with {len(self.drivers)} browser(s) sharing one rate budget")
+    
+    def submit(self, key, username, follows_back=None, fetch_pic=False):
+        """Queue a profile visit, collect it with result(key)"""
+        self.jobs.put((key, username, follows_back, fetch_pic))
+    
+    def _worker(self, number):
+        driver = self.drivers[number]
+        while not self.stopping:
+            job = self.jobs.get()
+            if job is None:
+                break
+            key, username, follows_back, fetch_pic = job
+            try:
+                result = check_profile(driver, username, follows_back, fetch_pic)
+                self.checks[number] += 1
+            except Exception as e:
+                if is_browser_gone(e):
+                    with self.ready:
+                        self.alive -= 1
+                        others_left = self.alive > 0
+                    if others_left:
+                        print(f"[!?] Profile check browser {number + 1} died - handing @{username} to the others")
+                        self.jobs.put(job)
+                        break
+                result = e
+            with self.ready:
+                self.results[key] = result
+                self.ready.notify_all()
+            if isinstance(result, Exception) and is_browser_gone(result):
+                break
+    
+    def result(self, key):
+        """Block until the job submitted as key is done, returns (follows_back, pic_url) or raises its error"""
+        with self.ready:
+            while key not in self.results:
+                self.ready.wait(1)  # Timed so Ctrl-C still gets through
+            result = self.results.pop(key)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    
+    def close(self):
+        """Stop the workers (dropping queued jobs), quit the extra browsers and report"""
+        self.stopping = True
+        for _ in self.threads:
+            self.jobs.put(None)
+        for thread in self.threads:
+            thread.join()
+        for extra_driver in self.drivers[1:]:
+            try:
+                extra_driver.quit()
+            except Exception:
+                pass
+        self.report()
+    
+    def report(self):
+        visits = sum(self.checks)
+        if not visits:
+            return
+        wall_time = max(time.time() - self.started, 1e-6)
+        per_browser = ', '.join(str(count) for count in self.checks)
+        print(f"[!] Profile checks: {visits} with {len(self.drivers)} browser(s) ({per_browser}), "
+              f"{visits / wall_time * 60:.1f} profiles/minute")
+        received = sum(get_bytes_received(worker_driver) - start
+                       for worker_driver, start in zip(self.drivers, self.start_bytes))
+        print(f"[!] WebDriver responses: {received / 1024:.1f} KB, {received / visits:.0f} bytes per profile")
+
+class StreamingResultWriter:
+    """Appends result records to a JSONL file one line at a time, so partial results are readable mid-run"""
+    
+    def __init__(self, path=JSONL_OUTPUT_FILE, resume_offset=None):
+        self.path = path
+        self.records = 0
+        self.downloads = 0
+        self.usernames = []  # Everyone written, for the follow graph
+        if resume_offset is None or not os.path.exists(path):
+            if resume_offset:
+                print(f"[!?] {path} is missing - results streamed before the checkpoint are lost")
+            self.file = open(path, 'w', encoding='utf-8')
             return
         
+        # Drop anything written after the checkpoint - those users are redone - and recount what is kept
+        with open(path, 'r+b') as f:
+            f.truncate(resume_offset)
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                self.records += 1
+                self.usernames.append(record['username'])
+                if record['pic_downloaded']:
+                    self.downloads += 1
+        self.file = open(path, 'a', encoding='utf-8')
+    
+    def write(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.file.flush()
+        self.records += 1
+        self.usernames.append(record['username'])
+        if record['pic_downloaded']:
+            self.downloads += 1
+    
+    def offset(self):
+        """Bytes written so far - saved in checkpoints so a resume can cut off later lines"""
+        return self.file.tell()
+    
+    def close(self, manifest):
+        """Close the records file and atomically write manifest next to it"""
+        self.file.close()
+        manifest = dict(manifest, records_file=self.path, total_results=self.records,
+                        successful_downloads=self.downloads, complete=True)
+        temp_path = f'{MANIFEST_FILE}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        os.replace(temp_path, MANIFEST_FILE)
+
+class BatchContext:
+    """What the targets of one --batch run share: the logged-in browser's profile pool, caches and seen avatars"""
+    
+    def __init__(self, driver, viewer=''):
+        self.driver = driver
+        self.viewer = viewer.lower()  # The logged-in account (--username), the only target its "Follows you" badges describe
+        self.profile_pool = None  # Started by the first target that needs profile visits, kept for the rest
+        self.avatar_cache = AvatarCache() if AVATAR_CACHE_DIR else None
+        self.relationship_store = RelationshipStore() if RELATIONSHIP_DB_FILE else None
+        self.follow_graph = FollowGraph() if FOLLOW_GRAPH_DB_FILE else None
+        self.avatar_urls = {}  # Lowercased username -> avatar URL seen in any target's lists or profile visits
+    
+    def is_viewer(self, username):
+        return bool(self.viewer) and username.lower() == self.viewer
+    
+    def get_profile_pool(self):
+        if self.profile_pool is None:
+            self.profile_pool = ProfileCheckPool(self.driver)
+        return self.profile_pool
+    
+    def reset_profile_pool(self):
+        """Drop the pool after a failed target, so its leftover jobs can't drive the browser during the next one"""
+        if self.profile_pool:
+            self.profile_pool.close()
+            self.profile_pool = None
+    
+    def remember_avatars(self, users):
+        for user in users:
+            if user.profile_pic_url and is_valid_twitter_profile_url(user.profile_pic_url, verbose=False):
+                self.avatar_urls.setdefault(user.username.lower(), user.profile_pic_url)
+    
+    def close(self):
+        self.reset_profile_pool()
+        if self.avatar_cache:
+            self.avatar_cache.save()
+            self.avatar_cache.report()
+        if self.relationship_store:
+            self.relationship_store.close()
+        if self.follow_graph:
+            self.follow_graph.close()
+
+def read_batch_targets(path):
+    """Usernames listed one per line in path, ignoring blank lines, # comments, @ prefixes and repeats"""
+    targets = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            username = line.split('#', 1)[0].strip().lstrip('@')
+            if username and username.lower() not in {target.lower() for target in targets}:
+                targets.append(username)
+    return targets
+
+def use_target_outputs(username):
+    """Point the output, picture and checkpoint paths at username's own directory under BATCH_OUTPUT_DIR"""
+    global DOWNLOAD_DIR, JSON_OUTPUT_FILE, JSONL_OUTPUT_FILE, MANIFEST_FILE, CHECKPOINT_FILE
+    target_dir = os.path.join(BATCH_OUTPUT_DIR, username.lower())
+    DOWNLOAD_DIR = os.path.join(target_dir, 'profile_pics')
+    JSON_OUTPUT_FILE = os.path.join(target_dir, 'mutual_following.json')
+    JSONL_OUTPUT_FILE = os.path.join(target_dir, 'mutual_following.jsonl')
+    MANIFEST_FILE = os.path.join(target_dir, 'mutual_following.manifest.json')
+    CHECKPOINT_FILE = os.path.join(target_dir, 'scraper_checkpoint.json')
+    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+
+def save_checkpoint(state):
+    """Atomically write the profile-check progress so an interrupted run can --resume"""
+    state = dict(state, saved_at=time.strftime('%Y-%m-%d %H:%M:%S'))
+    temp_path = f'{CHECKPOINT_FILE}.tmp'
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, default=UserRecord.json_default)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, CHECKPOINT_FILE)
+    except OSError as e:
+        print(f"[!?] Failed to write checkpoint: {e}")
+
+def load_checkpoint():
+    """Load the last checkpoint, or None if there isn't a usable one"""
+    try:
+        with open(CHECKPOINT_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"[!?] Ignoring unreadable checkpoint {CHECKPOINT_FILE}: {e}")
+        return None
+
+def clear_checkpoint():
+    """Remove the checkpoint once a run has finished and written its results"""
+    try:
+        os.remove(CHECKPOINT_FILE)
+    except FileNotFoundError:
+        pass
+
+def load_cached_list(username, list_type):
+    """The last complete copy of username's list from LIST_CACHE_FILE as UserRecords, newest first, or None"""
+    if not LIST_CACHE_FILE:
+        return None
+    try:
+        with open(LIST_CACHE_FILE, 'r', encoding='utf-8') as f:
+            cached = json.load(f).get(f'{username.lower()}/{list_type}')
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"[!?] Ignoring unreadable list cache {LIST_CACHE_FILE}: {e}")
+        return None
+    if not cached:
+        print(f"[!] No cached {list_type} list for @{username} yet - scrolling the whole list")
+        return None
+    return [UserRecord.from_dict(user) for user in cached['users']]
+
+def save_cached_list(username, list_type, users):
+    """Atomically store a complete list in LIST_CACHE_FILE for the next incremental run"""
+    if not LIST_CACHE_FILE:
+        return
+    try:
+        with open(LIST_CACHE_FILE, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    cache[f'{username.lower()}/{list_type}'] = {'saved_at': time.strftime('%Y-%m-%d %H:%M:%S'), 'users': users}
+    temp_path = f'{LIST_CACHE_FILE}.tmp'
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, default=UserRecord.json_default)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, LIST_CACHE_FILE)
+    except OSError as e:
+        print(f"[!?] Failed to write list cache: {e}")
+
+def is_browser_gone(error):
+    """Check whether an exception means the browser session itself is dead (no point continuing)"""
+    if isinstance(error, InvalidSessionIdException):
+        return True
+    message = str(error).lower()
+    return isinstance(error, WebDriverException) and any(
+        indicator in message for indicator in ['browsing context has been discarded', 'failed to establish a new connection',
+                                               'connection refused', 'session deleted', 'without establishing a connection']
+    )
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Find the X/Twitter accounts you follow that follow you back")
+    parser.add_argument('--username', help="Your X/Twitter username (without @) - prompted for if omitted")
+    parser.add_argument('--resume', action='store_true', help=f"Continue an interrupted run from {CHECKPOINT_FILE}")
+    parser.add_argument('--batch', metavar='FILE', help=f"Scrape every username listed in FILE with one browser, writing to {BATCH_OUTPUT_DIR}/<username>/")
+    parser.add_argument('--diff', metavar='USERNAME', help=f"Show how USERNAME's mutuals changed between the last two runs recorded in {FOLLOW_GRAPH_DB_FILE}")
+    parser.add_argument('--offline', metavar='SNAPSHOT_DIR', help="Re-parse recorded snapshots into the results JSON without a browser")
+    parser.add_argument('--incremental', action='store_true',
+                        help=f"Only scroll until the lists join their copies in {LIST_CACHE_FILE} from the last complete run")
+    parser.add_argument('--lean', action='store_true', help="Headless browser that skips images, media and fonts (needs a saved login)")
+    return parser.parse_args()
+
+def read_in_full(users):
+    """Whether a collected list was scrolled to its end this run, rather than cut short or joined to its cached copy"""
+    return getattr(users, 'complete', False) and not getattr(users, 'joined_cache', False)
+
+def record_follow_graph(shared, lists_complete, following_data, follower_usernames, mutual_usernames, failed_checks=0):
+    """Append this run's edge sets to FOLLOW_GRAPH_DB_FILE and print how the mutuals changed since the last run"""
+    if not FOLLOW_GRAPH_DB_FILE:
+        return
+    if not lists_complete:
+        # A list cut short would show everyone below the cut as an unfollow on the next diff, and a tail
+        # taken from the cache would hide real unfollows there
+        print(f"[!] Lists weren't read to the end this run (cut short or --incremental) - not recording it in {FOLLOW_GRAPH_DB_FILE}")
+        return
+    graph = shared.follow_graph if shared else FollowGraph()
+    try:
+        graph.record_run(USERNAME, 'following', [user.username for user in following_data])
+        if follower_usernames is not None:
+            graph.record_run(USERNAME, 'followers', follower_usernames)
+        if failed_checks:
+            # Users whose check failed are missing from the mutuals, which would read as lost then regained
+            print(f"[!] {failed_checks} follow-back checks failed - mutuals not recorded in {FOLLOW_GRAPH_DB_FILE} this run")
+        else:
+            graph.record_run(USERNAME, 'mutual', mutual_usernames)
+            report_mutual_changes(graph, USERNAME)
+    except sqlite3.Error as e:
+        print(f"[!?] Failed to record the run in {FOLLOW_GRAPH_DB_FILE}: {e}")
+    finally:
+        if not shared:
+            graph.close()
+
+def report_mutual_changes(graph, username, limit=20):
+    """Print the mutuals gained and lost between username's last two recorded runs"""
+    runs = graph.runs(username, 'mutual')
+    if len(runs) < 2:
+        print(f"[!] First run recorded in {FOLLOW_GRAPH_DB_FILE} for @{username} - changes are shown from the next run on")
+        return
+    gained, lost = graph.diff(username, 'mutual', runs[-2][0], runs[-1][0])
+    since = time.strftime('%Y-%m-%d %H:%M', time.localtime(runs[-2][1]))
+    print(f"\n=== CHANGES SINCE {since} ===")
+    print(f"[+] New mutuals: {len(gained)}" + (f" - {', '.join('@' + name for name in gained[:limit])}" if gained else ''))
+    print(f"[-] Lost mutuals: {len(lost)}" + (f" - {', '.join('@' + name for name in lost[:limit])}" if lost else ''))
+    for name in lost[:limit]:
+        first_seen, _ = graph.seen(username, 'mutual', name)
+        reason = 'no longer follows you' if graph.is_current(username, 'following', name) else 'you unfollowed them'
+        print(f"     @{name}: first seen as mutual {time.strftime('%Y-%m-%d', time.localtime(first_seen))}, {reason}")
+
+def run_diff(username):
+    """Print username's recorded runs and how the mutuals changed between the last two, without a browser"""
+    if not FOLLOW_GRAPH_DB_FILE or not os.path.exists(FOLLOW_GRAPH_DB_FILE):
+        print(f"[-] No follow graph at {FOLLOW_GRAPH_DB_FILE} - it is filled by complete runs")
+        return
+    graph = FollowGraph()
+    try:
+        runs = graph.runs(username, 'mutual')
+        if not runs:
+            print(f"[-] No runs recorded for @{username} in {FOLLOW_GRAPH_DB_FILE}")
+            return
+        print(f"[!] {len(runs)} recorded runs for @{username}:")
+        for run_id, recorded_at, edge_count in runs[-10:]:
+            print(f"     #{run_id}  {time.strftime('%Y-%m-%d %H:%M', time.localtime(recorded_at))}  {edge_count} mutuals")
+        report_mutual_changes(graph, username)
+    finally:
+        graph.close()
+
+def scrape_target(driver, checkpoint=None, shared=None):
+    """Collect USERNAME's lists, find the mutuals and write their results, with driver already logged in.
+    shared is the BatchContext of a --batch run. Returns a summary dict, or None if nothing could be collected"""
+    # "Follows you" badges on cells and profiles describe the logged-in account, so any other
+    # target's mutuals can only come from intersecting its own following and followers lists
+    lists_only = shared is not None and not shared.is_viewer(USERNAME)
+    if checkpoint:
+        following_data = [UserRecord.from_dict(user) for user in checkpoint['following_data']]
+        follower_usernames = set(checkpoint['follower_usernames']) if checkpoint['follower_usernames'] is not None else None
+        total_followers = checkpoint['total_followers']
+        lists_complete = checkpoint.get('lists_complete', False)
+        failed_checks = checkpoint.get('failed_checks', 0)
+        print(f"\n[+] Resuming from checkpoint saved {checkpoint['saved_at']}: "
+              f"{checkpoint['next_index']}/{len(following_data)} users already processed")
+    else:
         print('\n1. Fetching following (people you follow)...')
+        metrics.enter_phase('following list')
         following_data = get_following(driver, USERNAME)
         print(f'Found {len(following_data)} people you follow.')
         
@@ -711,206 +2843,503 @@ def main():
             print("   - The account is private")
             print("   - You're not logged in properly")
             print("   - The username is incorrect")
+            if shared:
+                # Other targets loaded fine with this session, so this one is private, suspended or doesn't exist
+                print(f"[-] Skipping @{USERNAME}")
+                return None
             print("⏳ Retrying login and following fetch...")
             if login_to_twitter(driver):
+                save_session(driver)
                 following_data = get_following(driver, USERNAME)
             if not following_data:
                 print("[-] Still no following data after retry. Exiting.")
-                return
+                return None
         
-        print('\n2. Downloading profile pictures and checking mutual following...')
+        follower_usernames = None
+        total_followers = 0
+        lists_complete = read_in_full(following_data)
+        failed_checks = 0
+        if MUTUAL_DETECTION_MODE == 'lists' or lists_only:
+            print('\n2. Fetching followers (people who follow you)...')
+            metrics.enter_phase('followers list')
+            followers_data = get_followers(driver, USERNAME)
+            total_followers = len(followers_data)
+            if shared:
+                shared.remember_avatars(followers_data)
+            print(f'Found {total_followers} people who follow you.')
+            
+            if followers_data:
+                # Mutuals are the intersection of both lists - no per-profile visits needed
+                follower_usernames = {user.username.lower() for user in followers_data}
+                lists_complete = lists_complete and read_in_full(followers_data)
+            elif not lists_only:
+                print("[-] No followers found - falling back to checking each profile individually")
         
+    if lists_only and follower_usernames is None:
+        print(f"[-] No followers list for @{USERNAME} - profile badges can't tell its mutuals, skipping")
+        return None
+    if shared:
+        shared.remember_avatars(following_data)
+    
+    print('\n3. Downloading profile pictures and checking mutual following...')
+    metrics.enter_phase('profile checks')
+    
+    if follower_usernames is None:
         # Get your profile page to check who follows you back
-        your_profile_url = f'https://x.com/{USERNAME}'
-        driver.get(your_profile_url)
-        time.sleep(PROFILE_CHECK_DELAY)
-        
-        # Now we'll check each person you follow - download pic first, then check if they follow back
-        mutual_following_data = []
+        your_profile_url = f'{X_BASE_URL}/{USERNAME}'
+        navigate(driver, your_profile_url)
+    
+    # Now we'll check each person you follow - download pic first, then check if they follow back
+    # (in 'jsonl' mode this only holds records still waiting on their avatar download)
+    mutual_following_data = []
+    start_index = 0
+    result_writer = None
+    if OUTPUT_FORMAT == 'jsonl':
+        result_writer = StreamingResultWriter(JSONL_OUTPUT_FILE, checkpoint.get('output_offset') if checkpoint else None)
+        print(f"[!] Streaming results to {JSONL_OUTPUT_FILE} as they are resolved")
+    if checkpoint:
+        start_index = checkpoint['next_index']
+        mutual_following_data = [UserRecord.from_dict(user) for user in checkpoint['mutual_following_data']]
+        for user_data in mutual_following_data:
+            if user_data.pic_downloaded is not False:
+                # Downloads still queued at checkpoint time count if their temp file made it to disk
+                user_data.pic_downloaded = bool(user_data.filename) and os.path.exists(os.path.join(DOWNLOAD_DIR, user_data.filename))
+                if not user_data.pic_downloaded:
+                    user_data.filename = None
+    
+    def checkpoint_state(next_index):
+        return {
+            'target_username': USERNAME,
+            'following_data': following_data,
+            'follower_usernames': sorted(follower_usernames) if follower_usernames is not None else None,
+            'total_followers': total_followers,
+            'lists_complete': lists_complete,
+            'failed_checks': failed_checks,
+            'next_index': next_index,
+            # Users at or past next_index are redone on resume, so leave out any partial result for them
+            'mutual_following_data': [user for user in mutual_following_data if user.position < next_index],
+            'output_offset': result_writer.offset() if result_writer else None
+        }
+    
+    def stream_record(user_data):
+        """JSONL form of a finished mutual - files are already named by follow order, so no renumbering later"""
+        record = user_data.to_result()
+        record['follow_number'] = len(following_data) - user_data.position
+        return record
+    
+    def flush_resolved_records():
+        """Write out the leading mutuals whose avatar outcome is known, keeping the file in list order"""
+        while mutual_following_data:
+            user_data = mutual_following_data[0]
+            if user_data.pic_downloaded is None:
+                downloaded = download_pool.pop_result(user_data.filename)
+                if downloaded is None:
+                    return
+                user_data.pic_downloaded = downloaded
+            result_writer.write(stream_record(mutual_following_data.pop(0)))
+    if shared:
+        # The relationship store holds badge results, which are only meaningful for the logged-in account
+        avatar_cache, relationship_store = shared.avatar_cache, None if lists_only else shared.relationship_store
+    else:
+        avatar_cache = AvatarCache() if AVATAR_CACHE_DIR else None
+        relationship_store = RelationshipStore() if RELATIONSHIP_DB_FILE else None
+    cached_count = 0
+    download_pool = ImageDownloadPool(cache=avatar_cache) if AVATAR_DOWNLOAD_WORKERS > 0 else None
+    
+    if not checkpoint:
+        save_checkpoint(checkpoint_state(0))  # The collected lists alone are worth keeping
+    
+    idx = start_index
+    profile_pool = None
+    try:
+        # Settle everyone who needs no browser first, so the profile workers can run ahead of the loop below
+        plans = {}
+        for job_idx, user_data in enumerate(following_data[start_index:], start_index):
+            username = user_data.username
+            cached = None
+            if follower_usernames is not None:
+                follows_you_back, source = username.lower() in follower_usernames, 'lists'
+            elif TRUST_FOLLOWS_YOU_INDICATOR and user_data.follows_you:
+                # Fast path: the list cell already showed "Follows you" - free, and newer than any cached result,
+                # which the record() below then overwrites
+                follows_you_back, source = True, 'indicator'
+            else:
+                if relationship_store:
+                    cached = relationship_store.get_fresh(USERNAME, username)
+                if cached:
+                    # Checked recently enough on a previous run - trust the stored result
+                    follows_you_back, source = cached['follows_back'], 'cache'
+                    if not user_data.profile_pic_url and cached['avatar_url']:
+                        user_data.profile_pic_url = intern_optional(cached['avatar_url'])
+                else:
+                    # Indicator missing or unclear - confirm on the profile page
+                    follows_you_back, source = None, 'profile'
+            
+            # Mutuals without a usable pre-extracted avatar need their profile page for the picture
+            needs_pic = not is_valid_twitter_profile_url(user_data.profile_pic_url, verbose=False)
+            if needs_pic and shared and shared.avatar_urls.get(username.lower()):
+                # Another target's list or profile visit already showed this account's picture
+                user_data.profile_pic_url = shared.avatar_urls[username.lower()]
+                needs_pic = False
+            queued = follows_you_back is None or (follows_you_back and needs_pic)
+            if queued:
+                if profile_pool is None:
+                    profile_pool = shared.get_profile_pool() if shared else ProfileCheckPool(driver)
+                # Keyed by target too, a batch's shared pool serves one target after another
+                profile_pool.submit((USERNAME, job_idx), username, follows_you_back, needs_pic)
+            plans[job_idx] = (follows_you_back, cached, source, queued)
         
-        for idx, user_data in enumerate(following_data):
-            username = user_data['username']
+        for idx, user_data in enumerate(following_data[start_index:], start_index):
+            user_started = time.perf_counter()
+            if result_writer:
+                flush_resolved_records()
+            username = user_data.username
             print(f"\n[!] Processing @{username}... ({idx + 1}/{len(following_data)})")
             
-            # STEP 1: Visit their profile and check if they follow you back
-            profile_url = f'https://x.com/{username}'
-            print(f"     [!] Navigating to {profile_url}")
-            driver.get(profile_url)
-            time.sleep(PROFILE_CHECK_DELAY)  # Longer delay to avoid rate limiting
-            
-            # First check if they follow you back
-            print(f"     [!] Checking if @{username} follows you back...")
-            follows_you_back = False
+            follows_you_back, cached, source, queued = plans.pop(idx)
             pic_url = None
             pic_downloaded = False
             temp_filename = None
             temp_filepath = None
             
             try:
-                # Add a small delay before checking page source
-                time.sleep(2)
+                # STEP 1: Check if they follow you back
+                if source == 'cache':
+                    cached_count += 1
+                    print(f"     [+] Using cached follow-back status from {time.strftime('%Y-%m-%d %H:%M', time.localtime(cached['checked_at']))}")
+                elif source == 'indicator':
+                    print(f"     [+] Follow back detected via list cell indicator (profile visit skipped)")
                 
-                # Multiple detection methods for follows you
-                
-                # Method 1: Check page source text
-                page_source = driver.page_source.lower()
-                follows_you_indicators = [
-                    'follows you',
-                    'follow you',
-                    'following you',
-                    'follows @' + USERNAME.lower(),
-                    'follow @' + USERNAME.lower(),
-                    'following @' + USERNAME.lower()
-                ]
-                
-                if any(indicator in page_source for indicator in follows_you_indicators):
-                    follows_you_back = True
-                    print(f"     [+] Follow back detected via text indicators")
-                
-                # Method 2: Try to find follows you element with CSS
-                if not follows_you_back:
-                    try:
-                        follows_you_elements = driver.find_elements(By.CSS_SELECTOR, 'span[dir="ltr"]')
-                        for element in follows_you_elements:
-                            try:
-                                text = element.text.lower()
-                                if any(indicator in text for indicator in ['follows you', 'follow you']):
-                                    follows_you_back = True
-                                    print(f"     [+] Follow back detected via element text")
-                                    break
-                            except:
-                                pass
-                    except:
-                        pass
+                fetched_pic_url = None
+                if queued:
+                    # Visited by a profile check worker, usually while earlier users were being handled here
+                    follows_you_back, fetched_pic_url = profile_pool.result((USERNAME, idx))
+                    if shared and fetched_pic_url:
+                        shared.avatar_urls[username.lower()] = intern_optional(fetched_pic_url)
                 
                 # STEP 2: Only download profile picture if they follow you back
                 if follows_you_back:
                     print(f"     [+] @{username} follows you back! (Mutual following)")
                     
-                    # Get profile picture URL
-                    pic_url = user_data.get('profile_pic_url')
-                    if not pic_url:
-                        print(f'     [!] No pre-extracted profile pic, fetching from profile page...')
-                        pic_url = get_profile_pic(driver, username)
-                    else:
-                        # Validate the pre-extracted URL
-                        if not is_valid_twitter_profile_url(pic_url, verbose=False):
-                            print(f'     [!?] Pre-extracted URL is invalid, fetching from profile page...')
-                            pic_url = get_profile_pic(driver, username)
+                    # Prefer the URL pre-extracted from the list, else what the profile page showed
+                    pic_url = user_data.profile_pic_url
+                    if not is_valid_twitter_profile_url(pic_url, verbose=False):
+                        pic_url = fetched_pic_url
                     
                     # Download the profile picture
                     if pic_url:
-                        # Create filename with temporary numbering (we'll rename later)
-                        temp_filename = f'temp_{idx:03d}_@{username}.jpg'
+                        if result_writer:
+                            # Streamed records can't wait for the final numbering, so name files by follow order now
+                            temp_filename = f'follow{len(following_data) - idx:05d}_@{username}.jpg'
+                        else:
+                            # Create filename with temporary numbering (we'll rename later)
+                            temp_filename = f'temp_{idx:03d}_@{username}.jpg'
                         temp_filepath = os.path.join(DOWNLOAD_DIR, temp_filename)
                         
-                        pic_downloaded = download_image(pic_url, temp_filepath, username)
-                        if pic_downloaded:
-                            print(f'     [+] Profile picture downloaded to {temp_filename}')
+                        if checkpoint and os.path.exists(temp_filepath) and os.path.getsize(temp_filepath) > 0:
+                            # Downloaded before the interruption but after the last checkpoint
+                            pic_downloaded = True
+                            print(f'     [+] Reusing profile picture from the interrupted run: {temp_filename}')
+                        elif download_pool:
+                            # Image I/O overlaps with the next profile checks; outcome is filled in later
+                            download_pool.submit(temp_filename, pic_url, temp_filepath, username)
+                            pic_downloaded = None
+                            print(f'     [!] Profile picture download queued as {temp_filename}')
                         else:
-                            print(f'     [-] Failed to download profile picture')
+                            pic_downloaded = download_image(pic_url, temp_filepath, username, cache=avatar_cache)
+                            if pic_downloaded:
+                                print(f'     [+] Profile picture downloaded to {temp_filename}')
+                            else:
+                                print(f'     [-] Failed to download profile picture')
                     else:
                         print(f'     [-] Could not find profile picture URL')
                     
                     # Add to mutual following data
-                    mutual_following_data.append({
-                        'username': user_data['username'],
-                        'follow_date': user_data['follow_date'],
-                        'position': user_data['position'],
-                        'source': 'mutual_following',
-                        'profile_pic_url': pic_url,
-                        'pic_downloaded': pic_downloaded,
-                        'temp_filename': temp_filename if pic_downloaded else None
-                    })
+                    user_data.profile_pic_url = intern_optional(pic_url)
+                    user_data.pic_downloaded = pic_downloaded
+                    user_data.filename = temp_filename if pic_downloaded is not False else None
+                    mutual_following_data.append(user_data)
                 else:
                     print(f"     [-] @{username} doesn't follow you back - skipping profile picture download")
+                
+                if relationship_store and cached is None:
+                    relationship_store.record(USERNAME, username, follows_you_back, pic_url or user_data.profile_pic_url)
                     
             except Exception as e:
+                if is_browser_gone(e):
+                    raise
                 print(f"     [!] Error checking @{username}: {e}")
+                failed_checks += 1
                 # If error, still keep the downloaded pic in case it's useful
                 continue
+            finally:
+                metrics.observe('user', time.perf_counter() - user_started)
             
-            # Add delay between each user to avoid rate limiting
-            if idx < len(following_data) - 1:  # Don't delay after the last user
-                print(f"     [!] Waiting {PROFILE_CHECK_DELAY} seconds to avoid rate limiting...")
-                time.sleep(PROFILE_CHECK_DELAY)
-        
-        # Sort by position: Twitter shows newest first at position 0
-        # We want oldest first (#1 = oldest follow), so we need to reverse the order
-        mutual_following_data.sort(key=lambda x: x['position'], reverse=True)
-        
-        list_type = "mutual following (people who follow you back)"
-        print(f'\n[+] Found {len(mutual_following_data)} {list_type} (ordered by when you followed them, oldest to newest):')
-        print("-" * 60)
-        
-        # Create a list to store results with timestamps
-        results = []
-        
-        # Now rename the temp files to proper numbered filenames and create results
-        for idx, user_data in enumerate(mutual_following_data, 1):
-            username = user_data['username']
-            print(f'{idx:3d}. @{username} (you followed them #{user_data["position"] + 1})')
-            
-            pic_downloaded = user_data.get('pic_downloaded', False)
-            temp_filename = user_data.get('temp_filename')
-            
-            if pic_downloaded and temp_filename:
-                # Rename temp file to proper numbered filename
-                old_filepath = os.path.join(DOWNLOAD_DIR, temp_filename)
-                new_filename = f'{idx:03d}_@{username}.jpg'
-                new_filepath = os.path.join(DOWNLOAD_DIR, new_filename)
-                
-                try:
-                    os.rename(old_filepath, new_filepath)
-                    print(f'     [+] Profile picture saved as {new_filename}')
-                except Exception as e:
-                    print(f'     [!] Error renaming file: {e}')
-                    new_filename = temp_filename  # Keep temp name if rename fails
-            else:
-                new_filename = None
-                print(f'     [-] No profile picture available')
-            
-            # Store result
-            results.append({
-                'number': idx,
-                'username': username,
-                'handle': f'@{username}',
-                'follow_date': user_data['follow_date'],
-                'original_position': user_data['position'],
-                'profile_pic_url': user_data.get('profile_pic_url'),
-                'pic_downloaded': pic_downloaded,
-                'filename': new_filename
-            })
-        
-        print(f'\n=== SUMMARY ===')
-        list_type = "mutual following (people who follow you back)"
-        print(f'[+] Total {list_type}: {len(mutual_following_data)}')
-        successful_downloads = sum(1 for r in results if r['pic_downloaded'])
-        print(f'[+] Profile pictures downloaded: {successful_downloads}/{len(mutual_following_data)}')
-        print(f'[!] Images saved to: {DOWNLOAD_DIR}/')
-        print(f'[!] Filename format: 001_@username.jpg, 002_@username.jpg, etc.')
-        print(f'[!] Ordered from: oldest person you followed (#1) to newest person you followed (#{len(mutual_following_data)})')
-        print(f'[!] Note: These are people YOU follow who also follow YOU back (mutual following)')
-        print(f'[!] Profile pictures were downloaded ONLY for mutual followers')
-        
-        # Save results to JSON file with timestamp
-        json_data = {
+            if (idx + 1) % CHECKPOINT_INTERVAL == 0:
+                save_checkpoint(checkpoint_state(idx + 1))
+    except BaseException:
+        # Interrupted or the browser died mid-run - keep everything finished so far
+        save_checkpoint(checkpoint_state(idx))
+        print(f"\n[!] Checkpoint saved at user {idx + 1}/{len(following_data)} - rerun with --resume to continue")
+        raise
+    finally:
+        if profile_pool and not shared:
+            profile_pool.close()
+    
+    metrics.enter_phase('avatar downloads')
+    if download_pool:
+        print('\n[!] Waiting for queued profile picture downloads to finish...')
+        download_results = download_pool.close()
+        for user_data in mutual_following_data:
+            if user_data.pic_downloaded is None:
+                user_data.pic_downloaded = download_results.get(user_data.filename, False)
+                if not user_data.pic_downloaded:
+                    user_data.filename = None
+    
+    if avatar_cache and not shared:
+        avatar_cache.save()
+        avatar_cache.report()
+    
+    for limiter in (navigation_limiter, scroll_limiter, image_limiter):
+        limiter.report()
+    metrics.enter_phase('output')
+    
+    if relationship_store:
+        if not shared:
+            relationship_store.close()
+        print(f'[!] Follow-back status reused from {RELATIONSHIP_DB_FILE} for {cached_count} users (TTL {RELATIONSHIP_TTL_HOURS}h)')
+    
+    if result_writer:
+        # Mutuals resolved in the loop's last iteration (or waiting on the download pool) are still pending here
+        flush_resolved_records()
+        result_writer.close({
             'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S'),
             'target_username': USERNAME,
-            'list_type': list_type,
-            'total_results': len(mutual_following_data),
+            'list_type': "mutual following (people who follow you back)",
+            'order': 'following list order, newest follow first - sort by follow_number for oldest first',
             'total_following': len(following_data),
-            'total_followers': 0,  # No followers data collected
-            'successful_downloads': successful_downloads,
-            'results': results
-        }
+            'total_followers': total_followers  # Only collected in 'lists' mode
+        })
+        print(f'\n=== SUMMARY ===')
+        print(f'[+] Total mutual following: {result_writer.records}')
+        print(f'[+] Profile pictures downloaded: {result_writer.downloads}/{result_writer.records}')
+        print(f'[!] Images saved to: {DOWNLOAD_DIR}/ as follow00001_@username.jpg (#1 = oldest follow)')
+        print(f'[!] Results streamed to: {JSONL_OUTPUT_FILE}, summary in {MANIFEST_FILE}')
+        clear_checkpoint()
+        record_follow_graph(shared, lists_complete, following_data, follower_usernames, result_writer.usernames, failed_checks)
+        return {'following': len(following_data), 'followers': total_followers, 'mutuals': result_writer.records,
+                'downloads': result_writer.downloads, 'output': JSONL_OUTPUT_FILE}
+    
+    # Sort by position: Twitter shows newest first at position 0
+    # We want oldest first (#1 = oldest follow), so we need to reverse the order
+    mutual_following_data.sort(key=lambda x: x.position, reverse=True)
+    
+    list_type = "mutual following (people who follow you back)"
+    print(f'\n[+] Found {len(mutual_following_data)} {list_type} (ordered by when you followed them, oldest to newest):')
+    print("-" * 60)
+    
+    # Now rename the temp files to proper numbered filenames - the records themselves are the results
+    for idx, user_data in enumerate(mutual_following_data, 1):
+        username = user_data.username
+        user_data.number = idx
+        print(f'{idx:3d}. @{username} (you followed them #{user_data.position + 1})')
         
-        try:
-            with open(JSON_OUTPUT_FILE, 'w', encoding='utf-8') as f:
-                json.dump(json_data, f, indent=2, ensure_ascii=False)
-            print(f'[!] Results saved to: {JSON_OUTPUT_FILE}')
-        except Exception as e:
-            print(f'[!?] Failed to save JSON file: {e}')
+        temp_filename = user_data.filename
+        
+        if user_data.pic_downloaded and temp_filename:
+            # Rename temp file to proper numbered filename
+            old_filepath = os.path.join(DOWNLOAD_DIR, temp_filename)
+            new_filename = f'{idx:03d}_@{username}.jpg'
+            new_filepath = os.path.join(DOWNLOAD_DIR, new_filename)
+            
+            try:
+                os.rename(old_filepath, new_filepath)
+                print(f'     [+] Profile picture saved as {new_filename}')
+            except Exception as e:
+                print(f'     [!] Error renaming file: {e}')
+                new_filename = temp_filename  # Keep temp name if rename fails
+            user_data.filename = new_filename
+        else:
+            print(f'     [-] No profile picture available')
+    
+    print(f'\n=== SUMMARY ===')
+    list_type = "mutual following (people who follow you back)"
+    print(f'[+] Total {list_type}: {len(mutual_following_data)}')
+    successful_downloads = sum(1 for user_data in mutual_following_data if user_data.pic_downloaded)
+    print(f'[+] Profile pictures downloaded: {successful_downloads}/{len(mutual_following_data)}')
+    print(f'[!] Images saved to: {DOWNLOAD_DIR}/')
+    print(f'[!] Filename format: 001_@username.jpg, 002_@username.jpg, etc.')
+    print(f'[!] Ordered from: oldest person you followed (#1) to newest person you followed (#{len(mutual_following_data)})')
+    print(f'[!] Note: These are people YOU follow who also follow YOU back (mutual following)')
+    print(f'[!] Profile pictures were downloaded ONLY for mutual followers')
+    
+    # Save results to JSON file with timestamp
+    json_data = {
+        'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'target_username': USERNAME,
+        'list_type': list_type,
+        'total_results': len(mutual_following_data),
+        'total_following': len(following_data),
+        'total_followers': total_followers,  # Only collected in 'lists' mode
+        'successful_downloads': successful_downloads,
+        'results': mutual_following_data
+    }
+    
+    try:
+        with open(JSON_OUTPUT_FILE, 'w', encoding='utf-8') as f:
+            json.dump(json_data, f, indent=2, ensure_ascii=False, default=UserRecord.to_result)
+        print(f'[!] Results saved to: {JSON_OUTPUT_FILE}')
+        clear_checkpoint()
+    except Exception as e:
+        print(f'[!?] Failed to save JSON file: {e}')
+    record_follow_graph(shared, lists_complete, following_data, follower_usernames,
+                        [user_data.username for user_data in mutual_following_data], failed_checks)
+    return {'following': len(following_data), 'followers': total_followers, 'mutuals': len(mutual_following_data),
+            'downloads': successful_downloads, 'output': JSON_OUTPUT_FILE}
+
+def run_batch(path, resume=False):
+    """Scrape each target listed in path in turn, sharing one logged-in browser, rate budget and set of caches"""
+    global USERNAME
+    try:
+        targets = read_batch_targets(path)
+    except OSError as e:
+        print(f"[-] Could not read batch file {path}: {e}")
+        return
+    if not targets:
+        print(f"[-] No usernames found in {path}")
+        return
+    
+    print("=== X/Twitter Mutual Following Scraper - batch mode ===")
+    print(f"Targets: {len(targets)} from {path}")
+    print(f"Output directory: {BATCH_OUTPUT_DIR}/<username>/")
+    print("=" * 50)
+    viewer = USERNAME
+    if viewer:
+        print(f"Logged-in account: @{viewer} ({MUTUAL_DETECTION_MODE} mode), every other target in lists mode")
+    else:
+        print("Every target in lists mode - pass --username to use profile checks for your own account")
+    
+    metrics.enter_phase('browser startup')
+    driver = setup_driver()
+    shared = None
+    outcomes = []
+    try:
+        metrics.enter_phase('login')
+        if not restore_session(driver):
+            if LEAN_BROWSER:
+                print(f"[-] A headless browser can't be logged into by hand. Run once without --lean to save {SESSION_FILE}.")
+                return
+            if not login_to_twitter(driver):
+                print("[-] Login failed. Cannot proceed without authentication.")
+                return
+        save_session(driver)
+        shared = BatchContext(driver, viewer)
+        
+        for number, username in enumerate(targets, 1):
+            USERNAME = username
+            use_target_outputs(username)
+            checkpoint = load_checkpoint() if resume else None
+            if resume and not checkpoint and (os.path.exists(JSON_OUTPUT_FILE) or os.path.exists(MANIFEST_FILE)):
+                print(f"\n[!] @{username} already finished in an earlier run - skipping")
+                outcomes.append((username, 'done earlier', None))
+                continue
+            
+            print(f"\n{'=' * 50}\n[!] Target {number}/{len(targets)}: @{username}\n{'=' * 50}")
+            target_started = time.perf_counter()
+            try:
+                summary = scrape_target(driver, checkpoint, shared)
+                outcomes.append((username, 'ok' if summary else 'skipped', summary))
+            except Exception as e:
+                shared.reset_profile_pool()
+                if is_browser_gone(e):
+                    outcomes.append((username, 'failed', None))
+                    print(f"[-] Browser closed while scraping @{username} - stopping the batch (rerun with --resume)")
+                    break
+                print(f"[-] Error scraping @{username}: {e} - moving on to the next target")
+                outcomes.append((username, 'failed', None))
+            finally:
+                metrics.observe('target', time.perf_counter() - target_started)
+    except KeyboardInterrupt:
+        print("\n[!?] Batch interrupted by user - rerun with --resume to continue")
+    finally:
+        if shared:
+            shared.close()
+        print("\n[!] Closing browser...")
+        driver.quit()
+        
+        if outcomes:
+            print(f'\n=== BATCH SUMMARY ===')
+            for username, status, summary in outcomes:
+                if summary:
+                    print(f"[+] @{username}: {summary['mutuals']} mutuals of {summary['following']} following, "
+                          f"{summary['downloads']} pictures -> {summary['output']}")
+                else:
+                    print(f"[-] @{username}: {status}")
+        metrics.enter_phase(None)
+        run_summary = metrics.summary()
+        metrics.report(run_summary)
+        metrics.write(run_summary)
+        print("[+] Done!")
+
+def main():
+    global USERNAME, LEAN_BROWSER, INCREMENTAL_SCROLL
+    args = parse_args()
+    if args.username:
+        USERNAME = args.username.lstrip('@')
+    if args.lean:
+        LEAN_BROWSER = True
+    if args.incremental:
+        INCREMENTAL_SCROLL = True
+    if args.offline:
+        run_offline(args.offline)
+        return
+    if args.diff:
+        run_diff(args.diff.lstrip('@'))
+        return
+    if args.batch:
+        run_batch(args.batch, args.resume)
+        return
+    
+    checkpoint = load_checkpoint() if args.resume else None
+    if args.resume and not checkpoint:
+        print(f"[!] No checkpoint found at {CHECKPOINT_FILE} - starting a fresh run")
+    if checkpoint and not USERNAME:
+        USERNAME = checkpoint['target_username']
+    if checkpoint and checkpoint.get('output_offset') is not None and OUTPUT_FORMAT != 'jsonl':
+        print(f"[-] Checkpoint was saved while streaming to {JSONL_OUTPUT_FILE}. Set OUTPUT_FORMAT = 'jsonl' to resume it.")
+        return
+    if checkpoint and checkpoint['target_username'].lower() != USERNAME.lower():
+        print(f"[-] Checkpoint is for @{checkpoint['target_username']}, not @{USERNAME}. Run without --resume to start over.")
+        return
+    
+    if not USERNAME:
+        USERNAME = input("Enter your X/Twitter username (without @): ").strip()
+    
+    # --- SETUP ---
+    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+    
+    print("=== X/Twitter Mutual Following Scraper ===")
+    print("(Finds people you follow who also follow you back)")
+    print(f"Target username: {USERNAME}")
+    print(f"Download directory: {DOWNLOAD_DIR}")
+    print("=" * 50)
+    
+    metrics.enter_phase('browser startup')
+    driver = setup_driver()
+    
+    try:
+        # Step 1: Login to Twitter (reusing the last run's session when it is still valid)
+        metrics.enter_phase('login')
+        if not restore_session(driver):
+            if LEAN_BROWSER:
+                print(f"[-] A headless browser can't be logged into by hand. Run once without --lean to save {SESSION_FILE}.")
+                return
+            if not login_to_twitter(driver):
+                print("[-] Login failed. Cannot proceed without authentication.")
+                return
+        save_session(driver)  # Also picks up any cookies X rotated since the last save
+        
+        scrape_target(driver, checkpoint)
         
     except KeyboardInterrupt:
         print("\n[!?] Process interrupted by user.")
@@ -921,6 +3350,10 @@ def main():
     finally:
         print("\n[!] Closing browser...")
         driver.quit()
+        metrics.enter_phase(None)
+        run_summary = metrics.summary()
+        metrics.report(run_summary)
+        metrics.write(run_summary)
         print("[+] Done!")
 
 if __name__ == '__main__':
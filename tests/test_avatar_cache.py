@@ -0,0 +1,39 @@
+import os
+
+import scraper
+
+URL = 'https://pbs.twimg.com/profile_images/1/a.jpg'
+
+
+class Response:
+    def __init__(self, content):
+        self.content = content
+        self.headers = {'ETag': '"v1"', 'content-type': 'image/jpeg'}
+
+
+def test_output_file_is_a_copy_of_the_cached_object(tmp_path):
+    cache = scraper.AvatarCache(str(tmp_path / 'cache'))
+    output = str(tmp_path / '001_@a.jpg')
+    cache.link(cache.store(URL, Response(b'original')), output)
+
+    with open(output, 'wb') as f:
+        f.write(b'edited in place')
+
+    with open(cache.lookup(URL), 'rb') as f:
+        assert f.read() == b'original'
+
+
+def test_damaged_object_is_dropped_instead_of_reused(tmp_path):
+    cache = scraper.AvatarCache(str(tmp_path / 'cache'))
+    path = cache.store(URL, Response(b'original'))
+    cache.save()
+    with open(path, 'wb') as f:
+        f.write(b'corrupted')  # e.g. edited through a hard link made by an older version
+
+    next_run = scraper.AvatarCache(str(tmp_path / 'cache'))
+    assert next_run.lookup(URL) is None
+    assert next_run.conditional_headers(URL) == {}  # No validators, so the server sends the image again
+    assert not os.path.exists(path)
+
+    assert next_run.store(URL, Response(b'original')) == path
+    assert next_run.lookup(URL) == path
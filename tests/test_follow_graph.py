@@ -0,0 +1,52 @@
+import pytest
+
+import scraper
+
+
+@pytest.fixture
+def graph(tmp_path):
+    graph = scraper.FollowGraph(str(tmp_path / 'follow_graph.db'))
+    yield graph
+    graph.close()
+
+
+def test_diff_between_consecutive_runs(graph):
+    graph.record_run('me', 'mutual', ['a', 'b', 'c'])
+    assert graph.diff('me', 'mutual') == ([], [])
+    graph.record_run('me', 'mutual', ['A', 'c', 'd'])  # Usernames are case-insensitive
+    assert graph.diff('me', 'mutual') == (['d'], ['b'])
+
+
+def test_diff_between_any_two_runs_and_sources_stay_separate(graph):
+    first = graph.record_run('me', 'mutual', ['a', 'b'])
+    graph.record_run('other', 'mutual', ['x', 'y'])
+    second = graph.record_run('me', 'mutual', ['a'])
+    third = graph.record_run('me', 'mutual', ['a', 'b', 'c'])
+
+    assert graph.diff('me', 'mutual', first, third) == (['c'], [])
+    assert graph.diff('me', 'mutual', third, first) == ([], ['c'])
+    assert graph.diff('me', 'mutual', first, second) == ([], ['b'])
+    assert graph.diff('me', 'mutual', second, third) == (['b', 'c'], [])
+    assert [run[2] for run in graph.runs('me', 'mutual')] == [2, 1, 3]
+
+
+def test_unchanged_edges_are_not_rewritten(graph):
+    for _ in range(5):
+        graph.record_run('me', 'following', ['a', 'b'])
+    graph.record_run('me', 'following', ['a'])
+    graph.record_run('me', 'following', ['a', 'b'])
+    rows = graph.connection.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+    assert rows == 3  # a's open interval, b's closed one and b's reopened one
+
+
+def test_seen_and_is_current(graph):
+    graph.record_run('me', 'mutual', ['a'])
+    graph.record_run('me', 'mutual', ['a', 'b'])
+    graph.record_run('me', 'mutual', ['b'])
+    recorded_at = [run[1] for run in graph.runs('me', 'mutual')]
+
+    assert graph.seen('me', 'mutual', 'a') == (recorded_at[0], recorded_at[1])
+    assert graph.seen('me', 'mutual', 'b') == (recorded_at[1], recorded_at[2])
+    assert graph.seen('me', 'mutual', 'nobody') is None
+    assert graph.is_current('me', 'mutual', 'b')
+    assert not graph.is_current('me', 'mutual', 'a')
@@ -0,0 +1,49 @@
+import scraper
+
+
+def users(names, **flags):
+    return [scraper.UserRecord(name, position, **flags) for position, name in enumerate(names)]
+
+
+def collect(anchor, names):
+    collected = scraper.CollectedUsers()
+    joined = False
+    for user in users(names):
+        collected.append(user)
+        joined = anchor.feed(collected)
+        if joined:
+            break
+    return collected, joined
+
+
+def test_joins_after_a_run_of_cached_users_in_order():
+    previous = users(['c', 'd', 'e', 'f', 'g', 'h'])
+    anchor = scraper.PreviousListAnchor(previous, run_length=3)
+    collected, joined = collect(anchor, ['new1', 'new2', 'c', 'd', 'e', 'f'])
+    assert joined
+    assert [user.username for user in collected] == ['new1', 'new2', 'c', 'd', 'e']
+
+    assert anchor.merge_tail(collected) == 3
+    assert [user.username for user in collected] == ['new1', 'new2', 'c', 'd', 'e', 'f', 'g', 'h']
+    assert [user.position for user in collected] == list(range(8))
+    assert collected.joined_cache
+
+
+def test_reordered_or_interrupted_runs_do_not_join():
+    previous = users(['a', 'b', 'c', 'd', 'e'])
+    anchor = scraper.PreviousListAnchor(previous, run_length=3)
+    # Cached users, but never three in a row in their cached order
+    _, joined = collect(anchor, ['b', 'a', 'c', 'x', 'd', 'e'])
+    assert not joined
+    assert anchor.matched_index is None
+
+
+def test_merged_tail_users_lose_their_stale_badges():
+    previous = users(['a', 'b', 'c'], follows_you=True, has_status_indicator=True)
+    anchor = scraper.PreviousListAnchor(previous, run_length=1)
+    collected, joined = collect(anchor, ['a'])
+    assert joined
+    anchor.merge_tail(collected)
+    tail = collected[1:]
+    assert [user.username for user in tail] == ['b', 'c']
+    assert not any(user.follows_you or user.has_status_indicator for user in tail)
@@ -0,0 +1,23 @@
+import pytest
+
+import benchmark
+
+
+@pytest.mark.parametrize('capacity', [0.05, 0.3, 1.0])
+def test_limiter_converges_on_server_capacity(capacity):
+    rows, limiter = benchmark.simulate_rate_limiter(capacity, duration=3600)
+    first_half, second_half = rows[:len(rows) // 2], rows[len(rows) // 2:]
+
+    # Once settled, the limiter keeps most of the allowed rate busy without overshooting it
+    utilisation = sum(row[2] for row in second_half) / len(second_half) / capacity
+    assert 0.5 <= utilisation <= 1.05
+
+    # Throttling settles into a steady sawtooth instead of getting more frequent
+    assert max(row[3] for row in second_half) <= max(row[3] for row in first_half)
+    assert limiter.throttles <= 3 * len(rows)
+
+
+def test_limiter_backs_off_and_recovers():
+    rows, limiter = benchmark.simulate_rate_limiter(0.3, duration=3600)
+    assert all(limiter.min_rate <= row[1] <= limiter.max_rate for row in rows)
+    assert limiter.successes > 0 and limiter.throttles > 0
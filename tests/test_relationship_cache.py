@@ -0,0 +1,48 @@
+import json
+
+import scraper
+
+PIC_URL = 'https://pbs.twimg.com/profile_images/1/a.jpg'
+
+
+def run_profiles_mode(tmp_path, monkeypatch, following):
+    monkeypatch.chdir(tmp_path)
+    for name, value in dict(MUTUAL_DETECTION_MODE='profiles', TRUST_FOLLOWS_YOU_INDICATOR=True, OUTPUT_FORMAT='json',
+                            AVATAR_DOWNLOAD_WORKERS=0, AVATAR_CACHE_DIR=None, FOLLOW_GRAPH_DB_FILE=None,
+                            RELATIONSHIP_DB_FILE=str(tmp_path / 'relationships.db'), USERNAME='me').items():
+        monkeypatch.setattr(scraper, name, value)
+    monkeypatch.setattr(scraper, 'navigate', lambda *args, **kwargs: True)
+    monkeypatch.setattr(scraper, 'download_image', lambda *args, **kwargs: True)
+    (tmp_path / scraper.DOWNLOAD_DIR).mkdir()
+    checkpoint = {'target_username': 'me', 'following_data': [user.to_dict() for user in following],
+                  'follower_usernames': None, 'total_followers': 0, 'next_index': 0,
+                  'mutual_following_data': [], 'output_offset': None, 'saved_at': 'test'}
+    return scraper.scrape_target(None, checkpoint)
+
+
+def test_badge_beats_a_fresh_cached_negative(tmp_path, monkeypatch):
+    store = scraper.RelationshipStore(str(tmp_path / 'relationships.db'))
+    store.record('me', 'newmutual', False)
+    store.close()
+    following = [scraper.UserRecord('newmutual', 0, follows_you=True, profile_pic_url=PIC_URL)]
+
+    summary = run_profiles_mode(tmp_path, monkeypatch, following)
+
+    assert summary['mutuals'] == 1
+    with open(scraper.JSON_OUTPUT_FILE, encoding='utf-8') as f:
+        assert [user['username'] for user in json.load(f)['results']] == ['newmutual']
+    store = scraper.RelationshipStore(str(tmp_path / 'relationships.db'))
+    assert store.get_fresh('me', 'newmutual')['follows_back'] is True  # The stale negative was overwritten
+    store.close()
+
+
+def test_fresh_cache_still_answers_without_a_badge(tmp_path, monkeypatch):
+    store = scraper.RelationshipStore(str(tmp_path / 'relationships.db'))
+    store.record('me', 'friend', True, PIC_URL)
+    store.record('me', 'stranger', False)
+    store.close()
+    following = [scraper.UserRecord('friend', 0), scraper.UserRecord('stranger', 1)]
+
+    summary = run_profiles_mode(tmp_path, monkeypatch, following)
+
+    assert summary['mutuals'] == 1  # Both answered from the cache - a profile visit would fail without a browser
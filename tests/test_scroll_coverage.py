@@ -0,0 +1,48 @@
+import scraper
+
+
+def test_overlapping_and_touching_spans_merge():
+    coverage = scraper.ScrollCoverage()
+    coverage.add((0, 500))
+    coverage.add((400, 900))
+    coverage.add((901, 1200))  # Within the tolerance of the previous end
+    coverage.add(None)  # A failed read adds nothing
+    assert coverage.spans == [[0, 1200]]
+    assert coverage.gaps() == []
+
+
+def test_unread_stretches_are_reported_as_gaps_until_filled():
+    coverage = scraper.ScrollCoverage()
+    coverage.add((1500, 2000))
+    coverage.add((0, 600))
+    coverage.add((900, 1200))
+    assert coverage.gaps() == [(600, 900), (1200, 1500)]
+
+    coverage.add((550, 950))
+    assert coverage.gaps() == [(1200, 1500)]
+    coverage.add((1150, 1550))
+    assert coverage.spans == [[0, 2000]]
+
+
+def test_reach_is_the_end_of_the_last_span_starting_above_position():
+    coverage = scraper.ScrollCoverage()
+    coverage.add((0, 600))
+    coverage.add((900, 1200))
+    assert coverage.reach(700) == 600
+    assert coverage.reach(1000) == 1200
+    assert scraper.ScrollCoverage().reach(100) is None
+
+
+def test_next_step_keeps_an_overlap_with_what_was_read():
+    viewport = 1000
+    overlap = viewport * scraper.SCROLL_STEP_OVERLAP
+    coverage = scraper.ScrollCoverage()
+    coverage.add((0, 2500))  # Rows mounted well below the viewport
+    assert scraper.next_scroll_target(coverage, {'scrollY': 0, 'viewport': viewport}) == int(2500 - overlap)
+
+    # Nothing read below the viewport: step down by less than a viewport so no row is skipped
+    coverage = scraper.ScrollCoverage()
+    coverage.add((0, 1000))
+    step = scraper.next_scroll_target(coverage, {'scrollY': 1000, 'viewport': viewport})
+    assert step == int(1000 + viewport - overlap)
+    assert step < 1000 + viewport
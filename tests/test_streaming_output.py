@@ -0,0 +1,61 @@
+import json
+
+import scraper
+
+
+def record(username, downloaded=True):
+    return {'username': username, 'pic_downloaded': downloaded}
+
+
+def read_usernames(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line)['username'] for line in f]
+
+
+def test_resume_drops_lines_after_the_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(scraper, 'MANIFEST_FILE', str(tmp_path / 'manifest.json'))
+    path = str(tmp_path / 'results.jsonl')
+    writer = scraper.StreamingResultWriter(path)
+    writer.write(record('a'))
+    writer.write(record('b', downloaded=False))
+    checkpoint_offset = writer.offset()
+    writer.write(record('c'))  # Written after the checkpoint, so redone on resume
+    writer.file.close()
+
+    resumed = scraper.StreamingResultWriter(path, checkpoint_offset)
+    assert (resumed.records, resumed.downloads, resumed.usernames) == (2, 1, ['a', 'b'])
+    resumed.write(record('c'))
+    resumed.close({'target_username': 'me'})
+
+    assert read_usernames(path) == ['a', 'b', 'c']
+    with open(scraper.MANIFEST_FILE, encoding='utf-8') as f:
+        manifest = json.load(f)
+    assert (manifest['total_results'], manifest['successful_downloads'], manifest['complete']) == (3, 2, True)
+
+
+def test_missing_file_on_resume_starts_over(tmp_path, capsys):
+    path = str(tmp_path / 'results.jsonl')
+    writer = scraper.StreamingResultWriter(path, resume_offset=123)
+    writer.write(record('a'))
+    writer.file.close()
+    assert read_usernames(path) == ['a']
+    assert 'missing' in capsys.readouterr().out
+
+
+def test_last_mutuals_are_written_without_a_download_pool(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name, value in dict(OUTPUT_FORMAT='jsonl', AVATAR_DOWNLOAD_WORKERS=0, AVATAR_CACHE_DIR=None,
+                            RELATIONSHIP_DB_FILE=None, FOLLOW_GRAPH_DB_FILE=None, USERNAME='me').items():
+        monkeypatch.setattr(scraper, name, value)
+    monkeypatch.setattr(scraper, 'download_image', lambda *args, **kwargs: True)
+    (tmp_path / scraper.DOWNLOAD_DIR).mkdir()
+    pic_url = 'https://pbs.twimg.com/profile_images/1/a.jpg'
+    following = [scraper.UserRecord(f'u{i}', i, profile_pic_url=pic_url) for i in range(4)]
+    checkpoint = {'target_username': 'me', 'following_data': [user.to_dict() for user in following],
+                  'follower_usernames': ['u0', 'u2', 'u3'], 'total_followers': 3, 'next_index': 0,
+                  'mutual_following_data': [], 'output_offset': None, 'saved_at': 'test'}
+
+    summary = scraper.scrape_target(None, checkpoint)
+
+    assert summary['mutuals'] == 3
+    assert read_usernames(scraper.JSONL_OUTPUT_FILE) == ['u0', 'u2', 'u3']
@@ -0,0 +1,102 @@
+import scraper
+
+ROW = 72
+HEADER = 300
+
+
+class VirtualizedListDriver:
+    """A virtualized list that mounts only the rows in the viewport and loads page rows at a time at the bottom.
+    late_row has no links the first time it is mounted and only renders once it has been scrolled away and back"""
+
+    def __init__(self, total, late_row, page=20, viewport=800):
+        self.total, self.late_row, self.page, self.viewport = total, late_row, page, viewport
+        self.loaded = page
+        self.scrollY = 0
+        self.late_state = 'pending'
+        self.processed = set()
+        self.mounted = set()
+        self.command_stats = {'total': 0}
+        self.remount()
+
+    def height(self):
+        return HEADER + self.loaded * ROW + 100
+
+    def remount(self):
+        first = max(0, (self.scrollY - HEADER) // ROW)
+        last = min(self.loaded - 1, (self.scrollY + self.viewport - HEADER) // ROW)
+        mounted = set(range(first, last + 1))
+        unmounted = self.mounted - mounted
+        if self.late_row in unmounted and self.late_state == 'rendering':
+            self.late_state = 'ready'
+        self.processed -= unmounted  # Remounted rows are fresh elements without the processed attribute
+        self.mounted = mounted
+
+    def at_bottom(self):
+        return self.scrollY + self.viewport >= self.height() - 2
+
+    def read_spans(self):
+        spans, current = [], None
+        for row in sorted(self.mounted):
+            if row not in self.processed:
+                current = None
+            elif current:
+                current[1] = HEADER + (row + 1) * ROW
+            else:
+                current = [HEADER + row * ROW, HEADER + (row + 1) * ROW]
+                spans.append(current)
+        return spans
+
+    def set_script_timeout(self, seconds):
+        pass
+
+    def execute_async_script(self, script, target, *args):
+        self.scrollY = max(0, min(target, self.height() - self.viewport))
+        before = set(self.mounted)
+        self.remount()
+        reason = 'rows' if self.mounted - before else 'stepped'
+        if self.at_bottom():
+            if self.loaded < self.total:
+                self.loaded = min(self.total, self.loaded + self.page)
+                self.remount()
+                reason = 'rows'
+            elif reason == 'stepped':
+                reason = 'idle'
+        span = [HEADER + min(self.mounted) * ROW, HEADER + (max(self.mounted) + 1) * ROW] if self.mounted else None
+        return {'reason': reason, 'loading': False, 'atBottom': self.at_bottom(), 'span': span,
+                'scrollY': self.scrollY, 'viewport': self.viewport, 'height': self.height()}
+
+    def execute_script(self, script, *args):
+        if script is not scraper.EXTRACT_USER_CELLS_JS:
+            return None
+        cells = []
+        for row in sorted(self.mounted - self.processed):
+            rendered = row != self.late_row or self.late_state == 'ready'
+            if not rendered:
+                self.late_state = 'rendering'
+            else:
+                self.processed.add(row)
+            cells.append({'hrefs': [f'https://x.com/u{row}'] if rendered else [], 'time': None, 'avatar': None,
+                          'has_status': True, 'follows_you': False, 'top': HEADER + row * ROW})
+        return {'cells': cells, 'spans': self.read_spans()}
+
+    def find_elements(self, *args):
+        return []
+
+
+def test_row_that_renders_late_is_revisited(monkeypatch, capsys):
+    monkeypatch.setattr(scraper, 'CELL_EXTRACTION_MODE', 'script')
+    monkeypatch.setattr(scraper, 'LIST_INGESTION_MODE', 'dom')
+    monkeypatch.setattr(scraper, 'scroll_limiter', scraper.AdaptiveRateLimiter('scroll', 1000))
+    driver = VirtualizedListDriver(total=200, late_row=37)
+
+    users = scraper.scroll_and_collect_users_with_dates(driver, 'following')
+
+    assert [user.username for user in users] == [f'u{row}' for row in range(200)]
+    assert [user.position for user in users] == list(range(200))
+    assert 'Revisiting unread rows' in capsys.readouterr().out
+
+
+def test_unread_cell_splits_coverage():
+    coverage = scraper.ScrollCoverage()
+    scraper.add_read_spans(coverage, [[0, 216], [288, 576]])  # The row at 216-288 was mounted but not read
+    assert coverage.gaps() == [(216, 288)]